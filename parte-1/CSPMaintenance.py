@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
 import sys
-from constraint import Problem
+import math
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+from itertools import islice, product
+from collections import deque
+from constraint import Problem, Constraint
 
 def parse_posiciones(linea):
     partes = linea.split(":")
@@ -43,208 +51,721 @@ def leer_datos(ruta_fichero):
 
     return franjas, tam_matriz, talleres_std, talleres_spc, parkings, aviones
 
-def filtrar_soluciones(soluciones):
-    soluciones_unicas = []
-    for sol in soluciones:
-        if sol not in soluciones_unicas:
-            soluciones_unicas.append(sol)
-    return soluciones_unicas
-
-def escribir_salida(ruta_salida, soluciones, aviones, talleres_std, talleres_spc, parkings):
-    # Mapeo de cada posición a su tipo (STD, SPC, PRK)
-    pos_type = {}
-    for p in talleres_std:
-        pos_type[p] = "STD"
-    for p in talleres_spc:
-        pos_type[p] = "SPC"
-    for p in parkings:
-        pos_type[p] = "PRK"
-
-    with open(ruta_salida, 'w', newline='') as f:
-        f.write(f"N. Sol: {len(soluciones)}\n")
-
-        if len(soluciones) == 0:
-            return
-
-        # Calcular la cantidad de franjas
-        numero_franjas = len(soluciones[0]) // len(aviones) if len(aviones) > 0 else 0
+class Instancia:
+    # Modelo compilado de una instancia, construido una vez en main y usado
+    # por las restricciones, los motores y la salida. Cada posición distinta
+    # tiene un código entero (su orden en STD, SPC, PRK) y los conjuntos de
+    # posiciones son máscaras con un bit por código, así que comprobar una
+    # restricción son operaciones con enteros, sin crear listas ni
+    # recorrerlas.
+    def __init__(self, franjas, talleres_std, talleres_spc, parkings, aviones):
+        self.franjas = franjas
+        self.aviones = aviones
+        self.variables = [[f"T_{avion['id']}_{t}" for t in range(franjas)] for avion in aviones]
+        self.jumbos = [i for i, avion in enumerate(aviones) if avion["tipo"] == "JMB"]
+        self.posiciones = list(dict.fromkeys(talleres_std + talleres_spc + parkings))
+        self.codigo = {pos: a for a, pos in enumerate(self.posiciones)}
+        self.std = self.mascara(talleres_std)
+        self.spc = self.mascara(talleres_spc)
+        self.prk = self.mascara(parkings)
+        self.talleres = self.std | self.spc
+        todas = (1 << len(self.posiciones)) - 1
+
+        # Por posición: tipo con el que se escribe en la salida, posiciones a
+        # distancia de Chebyshev como mucho 1 (ella incluida), las que no
+        # (jumbo_no_adyacente) y a las que se puede pasar en la franja
+        # siguiente (franjas_consecutivas)
+        self.tipo = []
+        self.cerca = []
+        self.lejanas = []
+        self.siguientes = []
+        for a, (row_a, col_a) in enumerate(self.posiciones):
+            bit_a = 1 << a
+            if bit_a & self.prk:
+                self.tipo.append("PRK")
+            elif bit_a & self.spc:
+                self.tipo.append("SPC")
+            else:
+                self.tipo.append("STD")
+            cerca = 0
+            for b, (row_b, col_b) in enumerate(self.posiciones):
+                if abs(row_a - row_b) <= 1 and abs(col_a - col_b) <= 1:
+                    cerca |= 1 << b
+            self.cerca.append(cerca)
+            self.lejanas.append(todas & ~cerca)
+            compatibles = bit_a
+            if bit_a & self.std:
+                compatibles |= self.spc
+            if bit_a & self.spc:
+                compatibles |= self.std
+            if bit_a & self.talleres:
+                compatibles |= self.prk
+            if bit_a & self.prk:
+                compatibles |= self.talleres
+            self.siguientes.append(compatibles)
+
+    def mascara(self, posiciones):
+        mascara = 0
+        for pos in posiciones:
+            mascara |= 1 << self.codigo[pos]
+        return mascara
+
+class TareasAvion(Constraint):
+    # Restricción sobre las franjas de un avión, en orden: primero sus t2
+    # tareas de tipo 2 en talleres SPC, después las t1 de tipo 1 (en STD, o en
+    # STD o SPC si el avión es restringido) y el resto de franjas en parkings.
+    # Si no le caben todas las tareas en las franjas no hay solución.
+    #
+    # Lo que puede haber en cada franja solo depende de las tareas que quedan
+    # al llegar a ella, así que las posiciones no válidas se quitan de los
+    # dominios antes de buscar (preProcess) y, con forward checking, en cuanto
+    # se comprueba la restricción, sin esperar a tener todas las franjas
+    # asignadas. permitidas[t] es la máscara de posiciones de la franja t.
+    def __init__(self, avion, instancia):
+        tareas_tipo2 = avion["t2"]
+        tareas_tipo1 = avion["t1"]
+        talleres_tipo1 = instancia.talleres if avion["restr"] else instancia.std
+        self.permitidas = []
+        for _ in range(instancia.franjas):
+            if tareas_tipo2 > 0:
+                self.permitidas.append(instancia.spc)
+                tareas_tipo2 -= 1
+            elif tareas_tipo1 > 0:
+                self.permitidas.append(talleres_tipo1)
+                tareas_tipo1 -= 1
+            else:
+                self.permitidas.append(instancia.prk)
+        self.pendientes = tareas_tipo1 + tareas_tipo2
+
+    def preProcess(self, variables, domains, constraints, vconstraints):
+        for variable, permitidas in zip(variables, self.permitidas):
+            domain = domains[variable]
+            for value in domain[:]:
+                if self.pendientes or not permitidas >> value & 1:
+                    domain.remove(value)
+
+    def __call__(self, variables, domains, assignments, forwardcheck=False):
+        if self.pendientes:
+            return False
+        for variable, permitidas in zip(variables, self.permitidas):
+            if variable in assignments:
+                if not permitidas >> assignments[variable] & 1:
+                    return False
+            elif forwardcheck:
+                domain = domains[variable]
+                for value in domain[:]:
+                    if not permitidas >> value & 1:
+                        domain.hideValue(value)
+                if not domain:
+                    return False
+        return True
 
-        for i, solucion in enumerate(soluciones, start=1):
-            f.write(f"Solución {i}:\n")
-            for avion in aviones:
-                restr_str = "T" if avion["restr"] else "F"
-                header = f"{avion['id']}-{avion['tipo']}-{restr_str}-{avion['t1']}-{avion['t2']}:"
-                posiciones = []
-                for t in range(numero_franjas):
-                    pos = solucion[f"T_{avion['id']}_{t}"]
-                    tipo = pos_type.get(pos, "???")
-                    posiciones.append(f"{tipo}({pos[0]},{pos[1]})")
+def clases_intercambiables(instancia):
+    # Clases de posiciones intercambiables: intercambiar dos posiciones de una
+    # clase en una solución da otra solución. Las restricciones solo miran el
+    # tipo de cada posición (STD, SPC, PRK) y si dos posiciones son la misma,
+    # salvo jumbo_no_adyacente, que mira qué posiciones están a distancia 1.
+    # Con menos de dos jumbos basta con el tipo; si no, las posiciones de una
+    # clase tienen además las mismas vecinas (sin contarse entre ellas).
+    # Devuelve las clases de más de una posición (códigos de la instancia),
+    # en el orden del dominio.
+    def tipo(a):
+        bit = 1 << a
+        return (bit & instancia.std != 0, bit & instancia.spc != 0, bit & instancia.prk != 0)
+
+    grupos = {}
+    if len(instancia.jumbos) < 2:
+        for a in range(len(instancia.posiciones)):
+            grupos.setdefault(tipo(a), []).append(a)
+    else:
+        # Mismas vecinas sin ser vecinas entre sí, o vecinas entre sí y con
+        # las mismas vecinas contándose a sí mismas
+        for a in range(len(instancia.posiciones)):
+            grupos.setdefault((tipo(a), instancia.cerca[a] & ~(1 << a)), []).append(a)
+        for clave, grupo in list(grupos.items()):
+            if len(grupo) == 1:
+                del grupos[clave]
+                a = grupo[0]
+                grupos.setdefault((tipo(a), instancia.cerca[a]), []).append(a)
+    return [grupo for grupo in grupos.values() if len(grupo) > 1]
+
+def expansiones(solucion, clases):
+    # Soluciones que representa una solución canónica: las posiciones usadas
+    # de cada clase se pueden llevar a cualquier otra posición de la clase
+    total = 1
+    usadas = set(solucion.values())
+    for clase in clases:
+        total *= math.perm(len(clase), len(usadas.intersection(clase)))
+    return total
+
+class PrecedenciaValores(Constraint):
+    # Ruptura de simetría de una clase de posiciones intercambiables
+    # p0, p1, ..., pk-1: recorriendo las variables en orden, pj solo puede
+    # aparecer si antes ha aparecido pj-1 (precedencia de valores). De cada
+    # grupo de soluciones que solo se diferencian en una permutación de la
+    # clase queda exactamente una.
+    def __init__(self, clase):
+        self.indice = {pos: j for j, pos in enumerate(clase)}
+
+    def __call__(self, variables, domains, assignments, forwardcheck=False):
+        # alcanzable: cota del número de posiciones de la clase aparecidas
+        alcanzable = 0
+        for variable in variables:
+            if alcanzable >= len(self.indice):
+                break
+            if variable in assignments:
+                j = self.indice.get(assignments[variable])
+                if j is not None:
+                    if j > alcanzable:
+                        return False
+                    if j == alcanzable:
+                        alcanzable += 1
+            else:
+                if forwardcheck:
+                    domain = domains[variable]
+                    for value in domain[:]:
+                        j = self.indice.get(value)
+                        if j is not None and j > alcanzable:
+                            domain.hideValue(value)
+                    if not domain:
+                        return False
+                alcanzable += 1
+        return True
 
-                # Unir las posiciones con ", "
-                posiciones_str = ", ".join(posiciones)
-                f.write(f"{header} {posiciones_str}\n")
+class MotorBits:
+    # Motor propio para el mismo modelo que crear_problema. El dominio de
+    # cada variable (avión, franja) es un entero con un bit por código de
+    # posición de la Instancia.
+    #
+    # - TareasAvion es unaria: fija los dominios iniciales.
+    # - franjas_consecutivas (franjas t y t+1 de un avión) y jumbo_unico con
+    #   jumbo_no_adyacente (dos jumbos en la misma franja, a distancia de
+    #   Chebyshev mayor que 1) son binarias y se mantienen arco-consistentes
+    #   con AC-3: un valor solo queda si tiene soporte en el dominio del otro.
+    # - capacidad_taller (como mucho dos aviones por taller y franja) se
+    #   propaga al fijar una variable: con dos aviones fijos en un taller, se
+    #   quita ese taller al resto de la franja.
+    # - no_adyacentes siempre se cumple (ninguna posición es vecina de sí
+    #   misma), así que no se modela.
+    #
+    # La búsqueda elige la variable con menos valores (MRV) y, a igualdad, la
+    # de más restricciones, y propaga después de cada asignación.
+    #
+    # Con clases (--simetrias) aplica además PrecedenciaValores sobre las
+    # variables en el mismo orden que crear_problema, así que las soluciones
+    # canónicas son las mismas con los dos motores.
+    def __init__(self, instancia, clases=()):
+        self.instancia = instancia
+        self.franjas = franjas = instancia.franjas
+        self.aviones = aviones = instancia.aviones
+        self.talleres = instancia.talleres
+
+        # Variables v = i * franjas + t, dominios iniciales y arcos (w, tabla)
+        n = len(aviones) * franjas
+        self.dominios = [0] * n
+        self.arcos = [[] for _ in range(n)]
+        for i, avion in enumerate(aviones):
+            tareas = TareasAvion(avion, instancia)
+            for t in range(franjas):
+                v = i * franjas + t
+                if not tareas.pendientes:
+                    self.dominios[v] = tareas.permitidas[t]
+                if t + 1 < franjas:
+                    self.arcos[v].append((v + 1, instancia.siguientes))
+                    self.arcos[v + 1].append((v, instancia.siguientes))
+        for k, i in enumerate(instancia.jumbos):
+            for j in instancia.jumbos[k + 1:]:
+                for t in range(franjas):
+                    v = i * franjas + t
+                    w = j * franjas + t
+                    self.arcos[v].append((w, instancia.lejanas))
+                    self.arcos[w].append((v, instancia.lejanas))
+        self.misma_franja = [[i * franjas + t for i in range(len(aviones))] for t in range(franjas)]
+        # Por clase: bits de sus posiciones en orden y, para cada j, la
+        # máscara de las posiciones de la clase posteriores a la j-ésima
+        self.clases = []
+        for clase in clases:
+            bits = [1 << a for a in clase]
+            posteriores = [sum(bits[j + 1:]) for j in range(len(bits))]
+            self.clases.append((bits, posteriores, sum(bits)))
+        self.grado = [len(self.arcos[v]) + len(aviones) - 1 for v in range(n)]
+
+    def propagar(self, dominios, cola):
+        # AC-3 desde las variables de cola y capacidad de los talleres.
+        # Devuelve False si algún dominio se queda vacío.
+        en_cola = set(cola)
+        while cola:
+            v = cola.popleft()
+            en_cola.discard(v)
+            dominio_v = dominios[v]
+            for w, tabla in self.arcos[v]:
+                dominio_w = dominios[w]
+                revisado = 0
+                resto = dominio_w
+                while resto:
+                    bit = resto & -resto
+                    resto ^= bit
+                    if tabla[bit.bit_length() - 1] & dominio_v:
+                        revisado |= bit
+                if revisado != dominio_w:
+                    if not revisado:
+                        return False
+                    dominios[w] = revisado
+                    if w not in en_cola:
+                        cola.append(w)
+                        en_cola.add(w)
+            if dominio_v & self.talleres and dominio_v & (dominio_v - 1) == 0:
+                franja = self.misma_franja[v % self.franjas]
+                ocupacion = sum(1 for u in franja if dominios[u] == dominio_v)
+                if ocupacion > 2:
+                    return False
+                if ocupacion == 2:
+                    for u in franja:
+                        if dominios[u] != dominio_v and dominios[u] & dominio_v:
+                            dominios[u] &= ~dominio_v
+                            if not dominios[u]:
+                                return False
+                            if u not in en_cola:
+                                cola.append(u)
+                                en_cola.add(u)
+        return True
 
-def main():
-    if len(sys.argv) != 2:
-        print("Uso: python CSPMaintenance.py <ruta_fichero_entrada>")
-        sys.exit(1)
+    def precedencia(self, dominios):
+        # PrecedenciaValores sobre los dominios. Devuelve las variables cuyo
+        # dominio ha cambiado, o None si alguno se queda vacío.
+        cambiadas = []
+        for bits, posteriores, mascara in self.clases:
+            alcanzable = 0
+            for v, dominio in enumerate(dominios):
+                if alcanzable >= len(bits):
+                    break
+                if dominio & posteriores[alcanzable]:
+                    dominio &= ~posteriores[alcanzable]
+                    if not dominio:
+                        return None
+                    dominios[v] = dominio
+                    cambiadas.append(v)
+                if dominio & mascara:
+                    if dominio & (dominio - 1) == 0 and dominio != bits[alcanzable]:
+                        continue
+                    alcanzable += 1
+        return cambiadas
+
+    def consistente(self, dominios, cola):
+        # propagar y precedencia hasta que no cambie ningún dominio
+        while self.propagar(dominios, cola):
+            if not self.clases:
+                return True
+            cambiadas = self.precedencia(dominios)
+            if cambiadas is None:
+                return False
+            if not cambiadas:
+                return True
+            cola = deque(dict.fromkeys(cambiadas))
+        return False
 
-    ruta_fichero = sys.argv[1]
-    ruta_salida = ruta_fichero.replace(".txt", ".csv")
+    def soluciones(self):
+        # Generador de soluciones con el formato de Problem.getSolutions()
+        dominios = list(self.dominios)
+        if dominios and all(dominios) and self.consistente(dominios, deque(range(len(dominios)))):
+            yield from self.buscar(dominios)
+
+    def buscar(self, dominios):
+        mejor = None
+        for v, dominio in enumerate(dominios):
+            if dominio & (dominio - 1):
+                clave = (bin(dominio).count("1"), -self.grado[v])
+                if mejor is None or clave < mejor[0]:
+                    mejor = (clave, v)
+        if mejor is None:
+            yield self.solucion(dominios)
+            return
+        v = mejor[1]
+        resto = dominios[v]
+        while resto:
+            bit = resto & -resto
+            resto ^= bit
+            hijos = list(dominios)
+            hijos[v] = bit
+            if self.consistente(hijos, deque([v])):
+                yield from self.buscar(hijos)
+
+    def solucion(self, dominios):
+        solucion = {}
+        for i, variables in enumerate(self.instancia.variables):
+            for t, variable in enumerate(variables):
+                solucion[variable] = dominios[i * self.franjas + t].bit_length() - 1
+        return solucion
+
+class MotorDP(MotorBits):
+    # Programación dinámica por franjas (--motor dp). Las restricciones entre
+    # aviones (capacidad_taller, jumbo_unico, jumbo_no_adyacente) son de una
+    # sola franja y franjas_consecutivas solo une franjas seguidas, así que
+    # el problema es un grafo por capas: en la capa t, las configuraciones
+    # (posición de cada avión) válidas en la franja t; entre capas, las
+    # transiciones que respetan franjas_consecutivas. Las soluciones son los
+    # caminos de la primera capa a la última.
+    #
+    # cuentas[t][configuración] es el número de formas de completar el plan
+    # desde esa configuración en la franja t (solo se guardan las que tienen
+    # alguna). contar() suma la primera capa sin enumerar nada y soluciones()
+    # recorre los caminos bajo demanda, siguiendo solo las configuraciones
+    # que se pueden completar. La memoria depende del número de
+    # configuraciones por franja, no del de soluciones.
+    def __init__(self, instancia, clases=()):
+        if clases:
+            raise ValueError("La ruptura de simetrías no se puede usar con el motor dp")
+        super().__init__(instancia)
+        self.cuentas = None
+
+    def configuraciones(self, candidatos):
+        # Configuraciones (tuplas de códigos, una posición por avión) con la
+        # del avión i en candidatos[i] que cumplen las restricciones de franja
+        n = len(candidatos)
+        configuracion = [0] * n
+        ocupacion = [0] * len(self.instancia.posiciones)
+        lejanas = self.instancia.lejanas
+        jumbos = self.instancia.jumbos
+
+        def colocar(i):
+            if i == n:
+                yield tuple(configuracion)
+                return
+            es_jumbo = self.aviones[i]["tipo"] == "JMB"
+            resto = candidatos[i]
+            while resto:
+                bit = resto & -resto
+                resto ^= bit
+                a = bit.bit_length() - 1
+                if bit & self.talleres and ocupacion[a] >= 2:
+                    continue
+                if es_jumbo and any(not lejanas[configuracion[j]] & bit for j in jumbos if j < i):
+                    continue
+                configuracion[i] = a
+                ocupacion[a] += 1
+                yield from colocar(i + 1)
+                ocupacion[a] -= 1
+
+        return colocar(0)
+
+    def sucesores(self, configuracion, t):
+        # Configuraciones de la franja t + 1 a las que se puede pasar
+        return self.configuraciones([self.dominios[i * self.franjas + t + 1] & self.instancia.siguientes[a]
+                                     for i, a in enumerate(configuracion)])
+
+    def calcular(self):
+        n = len(self.aviones)
+        franjas = self.franjas
+        self.cuentas = []
+        if n == 0 or franjas == 0 or not all(self.dominios):
+            return
+        ultima = [self.dominios[i * franjas + franjas - 1] for i in range(n)]
+        self.cuentas = [None] * franjas
+        self.cuentas[-1] = dict.fromkeys(self.configuraciones(ultima), 1)
+        for t in range(franjas - 2, -1, -1):
+            siguiente = self.cuentas[t + 1]
+            actual = {}
+            for configuracion in self.configuraciones([self.dominios[i * franjas + t] for i in range(n)]):
+                total = sum(siguiente.get(sucesor, 0) for sucesor in self.sucesores(configuracion, t))
+                if total:
+                    actual[configuracion] = total
+            self.cuentas[t] = actual
+
+    def contar(self):
+        if self.cuentas is None:
+            self.calcular()
+        return sum(self.cuentas[0].values()) if self.cuentas else 0
+
+    def soluciones(self):
+        if self.cuentas is None:
+            self.calcular()
+        if not self.cuentas:
+            return
+        camino = []
 
-    # Leer datos de entrada
-    franjas, tam_matriz, talleres_std, talleres_spc, parkings, aviones = leer_datos(ruta_fichero)
+        def seguir(t, configuracion):
+            camino.append(configuracion)
+            if t == self.franjas - 1:
+                yield self.solucion_camino(camino)
+            else:
+                for sucesor in self.sucesores(configuracion, t):
+                    if sucesor in self.cuentas[t + 1]:
+                        yield from seguir(t + 1, sucesor)
+            camino.pop()
+
+        for configuracion in self.cuentas[0]:
+            yield from seguir(0, configuracion)
+
+    def solucion_camino(self, camino):
+        solucion = {}
+        for i, variables in enumerate(self.instancia.variables):
+            for variable, configuracion in zip(variables, camino):
+                solucion[variable] = configuracion[i]
+        return solucion
+
+# Motores propios por nombre de --motor
+MOTORES = {"bits": MotorBits, "dp": MotorDP}
+
+# Resolución en paralelo (--procesos N): el espacio de búsqueda se parte
+# según las posiciones del primer avión en sus primeras --particion franjas.
+# Cada combinación es un subproblema con esas variables fijadas; los
+# subproblemas son disjuntos, así que no pueden repetirse soluciones entre
+# ellos. Cada proceso escribe las soluciones de su subproblema en un fichero
+# temporal y el proceso principal los lee en el orden de los subproblemas, de
+# modo que la salida no depende del número de procesos ni de cuál acaba
+# antes.
+
+def subproblemas(instancia, particion):
+    # Asignaciones {variable: código} del primer avión en sus primeras
+    # franjas, solo con las posiciones que permite TareasAvion
+    if not instancia.aviones or instancia.franjas == 0:
+        return [{}]
+    tareas = TareasAvion(instancia.aviones[0], instancia)
+    variables = instancia.variables[0][:particion]
+    valores = [[a for a in range(len(instancia.posiciones)) if tareas.permitidas[t] >> a & 1]
+               for t in range(len(variables))]
+    return [dict(zip(variables, combinacion)) for combinacion in product(*valores)]
+
+def resolver_subproblema(trabajo):
+    # Se ejecuta en un proceso del pool: resuelve un subproblema y escribe
+    # cada solución en una línea (códigos separados por espacios, en el orden
+    # de variables)
+    instancia, motor, clases, fijadas, ruta = trabajo
+    if motor in MOTORES:
+        motor_bits = MOTORES[motor](instancia, clases)
+        for t, codigo in enumerate(fijadas.values()):
+            motor_bits.dominios[t] &= 1 << codigo
+        soluciones = motor_bits.soluciones()
+    else:
+        problem = crear_problema(instancia, clases)
+        for variable, codigo in fijadas.items():
+            problem.addConstraint(lambda valor, codigo=codigo: valor == codigo, [variable])
+        soluciones = problem.getSolutionIter()
+    variables = [variable for fila in instancia.variables for variable in fila]
+    with open(ruta, 'w') as f:
+        for solucion in soluciones:
+            f.write(" ".join(str(solucion[v]) for v in variables) + "\n")
+    return ruta
+
+def soluciones_paralelas(instancia, clases, motor, procesos, particion):
+    # Generador de soluciones con los subproblemas repartidos entre procesos
+    variables = [variable for fila in instancia.variables for variable in fila]
+    with tempfile.TemporaryDirectory() as directorio, multiprocessing.Pool(procesos) as pool:
+        trabajos = [(instancia, motor, clases, fijadas, os.path.join(directorio, f"{k}.txt"))
+                    for k, fijadas in enumerate(subproblemas(instancia, particion))]
+        for ruta in pool.imap(resolver_subproblema, trabajos):
+            with open(ruta, 'r') as f:
+                for linea in f:
+                    yield dict(zip(variables, map(int, linea.split())))
+            os.remove(ruta)
+
+def escribir_salida(ruta_salida, soluciones, instancia, max_soluciones=None, clases=None):
+    # soluciones: iterable (p. ej. getSolutionIter); cada solución se escribe
+    # en cuanto llega, así que la memoria no crece con el número de
+    # soluciones. Como "N. Sol" va al principio, se escriben primero en un
+    # fichero temporal que al final se copia detrás de esa línea.
+    # Con clases (--expansiones), cada solución indica cuántas soluciones
+    # representa.
+    # Devuelve (soluciones escritas, soluciones que representan): como mucho
+    # max_soluciones escritas y, sin clases, cada una se representa a sí misma.
+    # Texto de cada código de posición (tipo y coordenadas) y cabecera de
+    # cada avión
+    textos = [f"{tipo}({pos[0]},{pos[1]})" for tipo, pos in zip(instancia.tipo, instancia.posiciones)]
+    cabeceras = []
+    for avion in instancia.aviones:
+        restr_str = "T" if avion["restr"] else "F"
+        cabeceras.append(f"{avion['id']}-{avion['tipo']}-{restr_str}-{avion['t1']}-{avion['t2']}:")
+
+    if max_soluciones is not None:
+        soluciones = islice(soluciones, max_soluciones)
+
+    ruta_temporal = ruta_salida + ".tmp"
+    numero_soluciones = 0
+    representadas = 0
+    with open(ruta_temporal, 'w', newline='') as f:
+        for i, solucion in enumerate(soluciones, start=1):
+            numero_soluciones = i
+            if clases is None:
+                representadas += 1
+                f.write(f"Solución {i}:\n")
+            else:
+                copias = expansiones(solucion, clases)
+                representadas += copias
+                f.write(f"Solución {i} ({copias} soluciones):\n")
+            for header, variables in zip(cabeceras, instancia.variables):
+                # Unir las posiciones con ", "
+                posiciones_str = ", ".join(textos[solucion[variable]] for variable in variables)
+                f.write(f"{header} {posiciones_str}\n")
 
-    dominio = talleres_std + talleres_spc + parkings
+    with open(ruta_salida, 'w', newline='') as f, open(ruta_temporal, 'r', newline='') as cuerpo:
+        f.write(f"N. Sol: {numero_soluciones}\n")
+        shutil.copyfileobj(cuerpo, f)
+    os.remove(ruta_temporal)
+    return numero_soluciones, representadas
+
+def crear_problema(instancia, clases=()):
+    # Modelo de python-constraint: una variable T_<id>_<franja> por avión y
+    # franja con el código de la posición que ocupa (ver Instancia). Cada
+    # posición tiene un solo código aunque esté repetida en el fichero, así
+    # que no hay soluciones repetidas que filtrar.
+    dominio = list(range(len(instancia.posiciones)))
     problem = Problem()
 
     # Crear variables
-    for avion in aviones:
-        for t in range(franjas):
-            problem.addVariable(f"T_{avion['id']}_{t}", dominio)
+    for variables in instancia.variables:
+        for variable in variables:
+            problem.addVariable(variable, dominio)
 
     # -------- Restricciones --------
+    talleres = instancia.talleres
+    cerca = instancia.cerca
+    siguientes = instancia.siguientes
+
     def capacidad_taller(*args):
-        talleres_ocupados = [pos for pos in args if pos in talleres_std + talleres_spc]
-        return all(talleres_ocupados.count(pos) <= 2 for pos in talleres_ocupados)
+        # una: talleres con algún avión; dos: con dos
+        una = dos = 0
+        for pos in args:
+            bit = 1 << pos
+            if bit & talleres:
+                if bit & dos:
+                    return False
+                if bit & una:
+                    dos |= bit
+                una |= bit
+        return True
 
+    # Estas dos solo reciben las variables de los jumbos
     def jumbo_unico(*args):
-        talleres_jumbo = [pos for pos, av in zip(args, aviones) if av["tipo"] == "JMB"]
-        return all(talleres_jumbo.count(pos) <= 1 for pos in talleres_jumbo)
-
-    def no_adyacentes(*args):
-        ocupados = [pos for pos in args if pos]
-        adyacencias = [
-            (pos[0] + dx, pos[1] + dy)
-            for pos in ocupados
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        ]
-
-        for pos in ocupados:
-            adyacentes_ocupados = sum(1 for ady in adyacencias if ady == pos)
-            if adyacentes_ocupados == len(adyacencias):
+        ocupadas = 0
+        for pos in args:
+            bit = 1 << pos
+            if bit & ocupadas:
                 return False
-
+            ocupadas |= bit
         return True
 
-    def orden_tareas_correcto(avion_id, restr, *variables):
-        posiciones = list(variables)
-        tareas_tipo2 = next(av["t2"] for av in aviones if av["id"] == avion_id)
-        tareas_tipo1 = next(av["t1"] for av in aviones if av["id"] == avion_id)
-
-        for pos in posiciones:
-            if tareas_tipo2 == 0 and tareas_tipo1 == 0:
-                if pos not in parkings:
-                    return False
-
-            if restr:
-                if tareas_tipo2 > 0:
-                    if pos not in talleres_spc:
-                        return False
-                    tareas_tipo2 -= 1
-                elif tareas_tipo1 > 0:
-                    if pos not in (talleres_std + talleres_spc):
-                        return False
-                    tareas_tipo1 -= 1
-            else:
-                if tareas_tipo1 > 0 and pos in talleres_std:
-                    tareas_tipo1 -= 1
-                elif tareas_tipo2 > 0 and pos in talleres_spc:
-                    tareas_tipo2 -= 1
-                elif (tareas_tipo1 > 0 or tareas_tipo2 > 0) and pos not in (talleres_std + talleres_spc):
-                    return False
-
-        return tareas_tipo1 == 0 and tareas_tipo2 == 0
-
     def jumbo_no_adyacente(*args):
-        posiciones_jumbo = [pos for pos, av in zip(args, aviones) if av["tipo"] == "JMB"]
-        for i, pos1 in enumerate(posiciones_jumbo):
-            for pos2 in posiciones_jumbo[i + 1:]:
-                if pos1 and pos2 and abs(pos1[0] - pos2[0]) <= 1 and abs(pos1[1] - pos2[1]) <= 1:
-                    return False
-        return True
-
-    def sin_tareas_en_parkings(aviones, franjas, vals, talleres_std, talleres_spc, parkings):
-        n_aviones = len(aviones)
-        positions = [[None]*franjas for _ in range(n_aviones)]
-
-        # Reconstruimos la matriz de posiciones para cada avión y franja horaria
-        for t in range(franjas):
-            for i, avion in enumerate(aviones):
-                positions[i][t] = vals[t*n_aviones + i]
-
-        for i, avion in enumerate(aviones):
-            tareas_tipo2 = avion["t2"]
-            tareas_tipo1 = avion["t1"]
-            for t, pos in enumerate(positions[i]):
-                # Si no hay tareas pendientes, debe estar en un parking
-                if tareas_tipo2 == 0 and tareas_tipo1 == 0:
-                    if pos not in parkings:
-                        return False
-                # Si hay tareas pendientes y el avión está en un taller especializado
-                elif tareas_tipo2 > 0:
-                    if pos in talleres_spc:
-                        tareas_tipo2 = max(0, tareas_tipo2 - 1)
-                    else:
-                        # Si no está en un taller especializado, es inválido
-                        return False
-                # Si hay tareas tipo 1 pendientes, puede estar en un taller estándar o especializado
-                elif tareas_tipo1 > 0:
-                    if pos in talleres_std or (pos in talleres_spc and tareas_tipo2 == 0):
-                        tareas_tipo1 = max(0, tareas_tipo1 - 1)
-                    else:
-                        # Si no está en un taller válido, es inválido
-                        return False
-                # Si aún hay tareas pendientes y el avión está en un parking, es inválido
-                elif (tareas_tipo1 > 0 or tareas_tipo2 > 0) and pos in parkings:
-                    return False
+        # Cerca de un jumbo anterior (cerca es simétrica)
+        vecindad = 0
+        for pos in args:
+            if vecindad >> pos & 1:
+                return False
+            vecindad |= cerca[pos]
         return True
 
-
-
     def franjas_consecutivas(var1, var2):
-        if var1 == var2:
-            return True
-        if (var1 in talleres_std and var2 in talleres_spc) or (var1 in talleres_spc and var2 in talleres_std):
-            return True
-        if (var1 in talleres_std + talleres_spc and var2 in parkings) or (var1 in parkings and var2 in talleres_std + talleres_spc):
-            return True
-        return False
+        return siguientes[var1] >> var2 & 1
+
+    # Añadir restricciones. no_adyacentes no se añade: pedía que alguna
+    # posición ocupada fuese a la vez todas las vecinas (4-vecindad) de las
+    # posiciones ocupadas, y una posición no es vecina de sí misma, así que
+    # nunca fallaba.
+    for t in range(instancia.franjas):
+        problem.addConstraint(capacidad_taller, [variables[t] for variables in instancia.variables])
+        if len(instancia.jumbos) > 1:
+            variables_jumbo = [instancia.variables[i][t] for i in instancia.jumbos]
+            problem.addConstraint(jumbo_unico, variables_jumbo)
+            problem.addConstraint(jumbo_no_adyacente, variables_jumbo)
+
+    for avion, variables in zip(instancia.aviones, instancia.variables):
+        # Tareas de cada avión en sus franjas (tipo 2, tipo 1 y parkings)
+        problem.addConstraint(TareasAvion(avion, instancia), variables)
+        for t in range(instancia.franjas - 1):
+            problem.addConstraint(franjas_consecutivas, [variables[t], variables[t + 1]])
+
+    # Ruptura de simetrías (--simetrias): solo soluciones canónicas
+    todas = [variable for variables in instancia.variables for variable in variables]
+    for clase in clases:
+        problem.addConstraint(PrecedenciaValores(clase), todas)
+
+    return problem
+
+def entero_no_negativo(texto):
+    # Tipo de --max-solutions: argparse convierte el error en parser.error
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{texto}' no es un número entero")
+    if valor < 0:
+        raise argparse.ArgumentTypeError(f"tiene que ser >= 0 (se ha dado {valor})")
+    return valor
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python CSPMaintenance.py <ruta_fichero_entrada> [--motor constraint|bits|dp]"
+              " [--max-solutions N] [--simetrias] [--expansiones] [--contar]"
+              " [--procesos N] [--particion K]"
+    )
+    parser.add_argument("ruta_fichero")
+    # constraint: backtracking genérico de python-constraint.
+    # bits: MotorBits, mismo modelo con dominios como máscaras de bits.
+    # dp: MotorDP, programación dinámica por franjas.
+    parser.add_argument("--motor", choices=["constraint", "bits", "dp"], default="constraint")
+    # Número máximo de soluciones que se escriben (por defecto, todas)
+    parser.add_argument("--max-solutions", type=entero_no_negativo, default=None)
+    # Ruptura de simetrías: de las soluciones que solo se diferencian en una
+    # permutación de posiciones intercambiables (clases_intercambiables) se
+    # escribe solo la canónica. --expansiones indica además en cada una
+    # cuántas soluciones representa.
+    parser.add_argument("--simetrias", action="store_true")
+    parser.add_argument("--expansiones", action="store_true")
+    # Solo cuenta las soluciones: el .csv tiene únicamente la línea "N. Sol".
+    # Con --motor dp se cuentan sin enumerarlas.
+    parser.add_argument("--contar", action="store_true")
+    # Resolución en paralelo con --procesos procesos (por defecto, uno solo),
+    # partiendo por las primeras --particion franjas del primer avión
+    parser.add_argument("--procesos", type=int, default=1)
+    parser.add_argument("--particion", type=int, default=2)
+    args = parser.parse_args()
+    if args.contar:
+        # --contar no escribe soluciones ni reparte la búsqueda
+        if args.max_solutions is not None:
+            parser.error("--max-solutions no tiene efecto con --contar")
+        if args.procesos > 1:
+            parser.error("--procesos no tiene efecto con --contar")
+        if args.expansiones:
+            parser.error("--expansiones no tiene efecto con --contar")
+
+    ruta_fichero = args.ruta_fichero
+    ruta_salida = ruta_fichero.replace(".txt", ".csv")
 
-    # Añadir restricciones
-    for avion in aviones:
-        for t in range(franjas):
-            problem.addConstraint(lambda pos: pos in dominio, [f"T_{avion['id']}_{t}"])
-
-    for t in range(franjas):
-        problem.addConstraint(capacidad_taller, [f"T_{avion['id']}_{t}" for avion in aviones])
-        problem.addConstraint(jumbo_unico, [f"T_{avion['id']}_{t}" for avion in aviones])
-        problem.addConstraint(no_adyacentes, [f"T_{avion['id']}_{t}" for avion in aviones])
-        problem.addConstraint(jumbo_no_adyacente, [f"T_{avion['id']}_{t}" for avion in aviones])
-        # Antes de resolver, juntar todas las variables en una sola lista
-        all_vars = []
-        for t in range(franjas):
-            for avion in aviones:
-                all_vars.append(f"T_{avion['id']}_{t}")
-
-        problem.addConstraint(
-            lambda *vals: sin_tareas_en_parkings(aviones, franjas, vals, talleres_std, talleres_spc, parkings),
-            all_vars
-        )
-
-
-    for avion in aviones:
-        problem.addConstraint(
-            lambda *vars, avion_id=avion["id"], restr=avion["restr"]: orden_tareas_correcto(avion_id, restr, *vars),
-            [f"T_{avion['id']}_{t}" for t in range(franjas)]
-        )
-        for t in range(franjas - 1):
-            problem.addConstraint(franjas_consecutivas, [f"T_{avion['id']}_{t}", f"T_{avion['id']}_{t+1}"])
+    # Leer datos de entrada
+    franjas, tam_matriz, talleres_std, talleres_spc, parkings, aviones = leer_datos(ruta_fichero)
+    instancia = Instancia(franjas, talleres_std, talleres_spc, parkings, aviones)
+
+    clases = []
+    if args.simetrias or args.expansiones:
+        if args.motor == "dp":
+            print("Error: --simetrias y --expansiones no se pueden usar con --motor dp.")
+            sys.exit(1)
+        clases = clases_intercambiables(instancia)
+
+    if args.contar:
+        if args.motor == "dp":
+            numero_soluciones = MotorDP(instancia).contar()
+        else:
+            if args.motor == "bits":
+                solutions = MotorBits(instancia, clases).soluciones()
+            else:
+                solutions = crear_problema(instancia, clases).getSolutionIter()
+            numero_soluciones = sum(1 for _ in solutions)
+        with open(ruta_salida, 'w', newline='') as f:
+            f.write(f"N. Sol: {numero_soluciones}\n")
+        print(f"N. Sol: {numero_soluciones} escrito en {ruta_salida}")
+        return
 
     # Resolver el problema
-    solutions = problem.getSolutions()
-    solutions = filtrar_soluciones(solutions)
-    escribir_salida(ruta_salida, solutions, aviones, talleres_std, talleres_spc, parkings)
+    if args.procesos > 1:
+        solutions = soluciones_paralelas(instancia, clases, args.motor, args.procesos, args.particion)
+    elif args.motor in MOTORES:
+        solutions = MOTORES[args.motor](instancia, clases).soluciones()
+    else:
+        problem = crear_problema(instancia, clases)
+        solutions = problem.getSolutionIter()
+    canonicas, representadas = escribir_salida(ruta_salida, solutions, instancia, args.max_solutions,
+                                               clases if args.expansiones else None)
+    if args.expansiones:
+        print(f"{canonicas} soluciones canónicas que representan {representadas} soluciones")
     print(f"Soluciones únicas escritas en {ruta_salida}")
 
 if __name__ == "__main__":
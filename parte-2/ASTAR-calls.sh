@@ -1,13 +1,13 @@
 #!/bin/bash
 
-# Ruta absoluta del script Python
-SCRIPT="./ASTARRodaje.py"
+# Ruta absoluta del script Python (ejecución por lotes de ASTARRodaje.py)
+SCRIPT="./ASTARLotes.py"
 
 # Ruta absoluta del directorio donde están los mapas
 MAP_DIR="./ASTAR-tests"
 
 # Heurísticas a usar
-HEURISTICAS=(1 2)
+HEURISTICAS=(1 2 3)
 
 # Verificar que el directorio de mapas existe
 if [ ! -d "$MAP_DIR" ]; then
@@ -15,21 +15,8 @@ if [ ! -d "$MAP_DIR" ]; then
     exit 1
 fi
 
-# Buscar todos los archivos que coincidan con el patrón mapa*.csv
-MAPAS=$(find "$MAP_DIR" -type f -name "mapa*.csv" | sort)
-
-# Verificar si hay mapas disponibles
-if [ -z "$MAPAS" ]; then
-    echo "Error: No se encontraron archivos que coincidan con el patrón mapa*.csv en $MAP_DIR."
-    exit 1
-fi
-
-# Ejecutar el script para cada mapa y heurística
-for MAPA in $MAPAS; do
-    for HEURISTICA in "${HEURISTICAS[@]}"; do
-        echo "Ejecutando $SCRIPT $MAPA $HEURISTICA"
-        python3 "$SCRIPT" "$MAPA" $HEURISTICA
-    done
-done
-
-echo "Ejecución completa."
+# Resolver todos los mapa*.csv con cada heurística en un único lote: cada
+# mapa se lee una vez y los trabajos se reparten entre varios procesos.
+# --sin-cache: los .stat no dependen de la caché de distancias del usuario
+echo "Ejecutando $SCRIPT $MAP_DIR --heuristicas ${HEURISTICAS[*]} --sin-cache"
+python3 "$SCRIPT" "$MAP_DIR" --patron "mapa*.csv" --heuristicas "${HEURISTICAS[@]}" --sin-cache
@@ -0,0 +1,114 @@
+#!/bin/bash
+
+# Comprueba las opciones de ASTARRodaje.py documentadas en el README: cada
+# combinación válida tiene que dar plan y cada combinación incompatible tiene
+# que rechazarse (comprobar_opciones) con un error de uso. Además resuelve
+# todos los mapas de prueba con cada lista abierta (--abierta). Se resuelve una
+# copia del mapa en un directorio temporal para no tocar ASTAR-tests.
+
+SCRIPT="$(cd "$(dirname "$0")" && pwd)/ASTARRodaje.py"
+MAPA="$(cd "$(dirname "$0")" && pwd)/ASTAR-tests/mapa05.csv"
+
+TMP_DIR=$(mktemp -d)
+trap 'rm -rf "$TMP_DIR"' EXIT
+cp "$MAPA" "$TMP_DIR/mapa.csv"
+
+# Combinaciones válidas (heurística y opciones)
+VALIDAS=(
+    "1"
+    "2 --sucesores od"
+    "2 --poda-sucesores"
+    "1 --poda-sucesores"
+    "2 --abierta minheap"
+    "2 --abierta cubos"
+    "2 --abierta cubos --desempate fifo"
+    "2 --abierta heapq"
+    "2 --abierta heapq --desempate fifo"
+    "2 --motor cbs"
+    "2 --motor cbs --max-makespan 20"
+    "2 --motor prioridades"
+    "2 --motor prioridades --reinicios 3 --semilla 7 --procesos 2"
+    "2 --motor prioridades --respaldo --max-makespan 20"
+    "2 --independencia"
+    "2 --independencia --max-makespan 20"
+    "2 --anytime"
+    "2 --anytime --peso-inicial 2.0 --paso-peso 0.25 --tiempo-limite 10 --desempate fifo"
+    "2 --ida"
+    "2 --ida --limite-tabla 1000"
+    "2 --procesos 2"
+    "2 --procesos 2 --lote 64"
+    "2 --metricas"
+    "2 --progreso 5"
+    "2 --sin-cache"
+    "2 --cache-distancias $TMP_DIR/cache"
+    "3"
+)
+
+# Combinaciones que se tienen que rechazar
+INVALIDAS=(
+    "2 --procesos 2 --ida"
+    "2 --procesos 2 --anytime"
+    "2 --motor cbs --poda-sucesores"
+    "2 --motor cbs --procesos 2"
+    "2 --motor cbs --sucesores od"
+    "2 --motor prioridades --anytime"
+    "2 --motor prioridades --max-makespan 20"
+    "2 --sucesores od --poda-sucesores"
+    "2 --sucesores od --abierta cubos"
+    "2 --reinicios 3"
+    "2 --tiempo-limite 5"
+    "2 --limite-tabla 1000"
+    "2 --lote 64"
+    "2 --desempate fifo"
+    "2 --abierta minheap --desempate fifo"
+)
+
+FALLOS=0
+for opciones in "${VALIDAS[@]}"; do
+    salida=$(python3 "$SCRIPT" "$TMP_DIR/mapa.csv" $opciones 2>&1)
+    if [[ "$salida" != *"Solución y estadísticas generadas."* ]]; then
+        echo "FALLO (debía dar plan): $opciones"
+        echo "$salida" | tail -n 3
+        FALLOS=$((FALLOS + 1))
+    fi
+done
+for opciones in "${INVALIDAS[@]}"; do
+    python3 "$SCRIPT" "$TMP_DIR/mapa.csv" $opciones > /dev/null 2>&1
+    if [ $? -ne 2 ]; then
+        echo "FALLO (debía rechazarse): $opciones"
+        FALLOS=$((FALLOS + 1))
+    fi
+done
+
+# --anytime sin tiempo para el primer plan: sin solución, pero con .stat
+rm -f "$TMP_DIR/mapa-2.stat"
+python3 "$SCRIPT" "$TMP_DIR/mapa.csv" 2 --anytime --tiempo-limite 0 > /dev/null 2>&1
+if ! grep -q "^Makespan: sin plan" "$TMP_DIR/mapa-2.stat" 2>/dev/null; then
+    echo "FALLO: --anytime --tiempo-limite 0 no escribe el .stat sin plan"
+    FALLOS=$((FALLOS + 1))
+fi
+
+# Listas abiertas de principio a fin: en todos los mapa*.csv de ASTAR-tests,
+# cubos y heapq (con los dos desempates) dan el mismo makespan que minheap
+for ruta in "$(dirname "$MAPA")"/mapa*.csv; do
+    nombre=$(basename "$ruta" .csv)
+    cp "$ruta" "$TMP_DIR/$nombre.csv"
+    for h in 1 2; do
+        python3 "$SCRIPT" "$TMP_DIR/$nombre.csv" $h --sin-cache > /dev/null 2>&1
+        esperado=$(grep "^Makespan" "$TMP_DIR/$nombre-$h.stat" 2>/dev/null)
+        rm -f "$TMP_DIR/$nombre-$h.stat"
+        for opciones in "--abierta cubos" "--abierta cubos --desempate fifo" \
+                        "--abierta heapq" "--abierta heapq --desempate fifo"; do
+            python3 "$SCRIPT" "$TMP_DIR/$nombre.csv" $h --sin-cache $opciones > /dev/null 2>&1
+            obtenido=$(grep "^Makespan" "$TMP_DIR/$nombre-$h.stat" 2>/dev/null)
+            rm -f "$TMP_DIR/$nombre-$h.stat"
+            if [ "$obtenido" != "$esperado" ]; then
+                echo "FALLO $nombre h$h $opciones: '$obtenido' (minheap: '$esperado')"
+                FALLOS=$((FALLOS + 1))
+            fi
+        done
+    done
+done
+
+echo "${#VALIDAS[@]} combinaciones válidas, ${#INVALIDAS[@]} incompatibles, $FALLOS fallos"
+[ $FALLOS -eq 0 ]
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Banco de pruebas de escalado de ASTARRodaje.py.
+#
+# 1. Regresión frente a los .stat de ASTAR-tests: resuelve cada mapa*.csv con
+#    cada heurística y comprueba que el makespan es el mismo y que no se
+#    expanden más nodos que en el .stat guardado.
+# 2. Escalado: genera con ASTARGenerador mapas cada vez mayores (tamaño,
+#    aviones, pasillos y proporción de grises) y mide para cada heurística el
+#    tiempo, los nodos expandidos y la memoria máxima (RSS) del proceso.
+#    Los resultados se comparan con la línea base guardada (ASTAR-bench/
+#    linea-base.json): se marca como regresión un makespan distinto, más
+#    nodos expandidos, un caso que antes se resolvía y ahora no, o un tiempo
+#    o una memoria peores que la línea base en más de --tolerancia.
+#
+# Cada ejecución es un proceso nuevo de ASTARRodaje.py con --sin-cache, para
+# medir también el cálculo de distancias. Los mapas son siempre los mismos
+# para una misma --semilla.
+#
+# Uso: python ASTARBenchmark.py [--heuristicas 1 2 3] [--tiempo-limite 60]
+#          [--tolerancia 0.5] [--linea-base ruta.json] [--guardar-linea-base]
+#          [--salida resultados.json] [--sin-escalado] [--semilla S]
+#          [--opciones "--sucesores od"]
+
+import os
+import sys
+import glob
+import json
+import time
+import shlex
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+
+from ASTARGenerador import generar_mapa, escribir_mapa
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(DIRECTORIO, "ASTARRodaje.py")
+DIRECTORIO_TESTS = os.path.join(DIRECTORIO, "ASTAR-tests")
+LINEA_BASE = os.path.join(DIRECTORIO, "ASTAR-bench", "linea-base.json")
+
+# Escenarios de escalado: se varía un parámetro cada vez
+ESCENARIOS = (
+    [{"nombre": f"tamano-{lado}", "filas": lado, "columnas": lado, "aviones": 3,
+      "gris": 0.15, "amarilla": 0.1, "pasillos": 0} for lado in (6, 10, 16, 24)] +
+    [{"nombre": f"aviones-{n}", "filas": 8, "columnas": 8, "aviones": n,
+      "gris": 0.15, "amarilla": 0.1, "pasillos": 0} for n in (2, 3, 4, 5)] +
+    [{"nombre": f"pasillos-{k}", "filas": 13, "columnas": 13, "aviones": 3,
+      "gris": 0.0, "amarilla": 0.2, "pasillos": k} for k in (3, 4)] +
+    [{"nombre": f"gris-{int(gris * 100)}", "filas": 12, "columnas": 12, "aviones": 3,
+      "gris": gris, "amarilla": 0.1, "pasillos": 0} for gris in (0.1, 0.25, 0.35)]
+)
+
+# Margen absoluto (s) por debajo del cual no se considera regresión de tiempo
+MARGEN_TIEMPO = 0.05
+
+def leer_stat(ruta):
+    estadisticas = {}
+    with open(ruta, 'r') as f_stat:
+        for line in f_stat:
+            clave, _, valor = line.strip().partition(": ")
+            estadisticas[clave] = valor
+    return estadisticas
+
+def ejecutar(ruta_mapa, heuristica, opciones, tiempo_limite):
+    # Ejecuta ASTARRodaje.py y devuelve el resultado leído del .stat con el
+    # tiempo de reloj y la memoria máxima del proceso (os.wait4, Unix)
+    base = os.path.splitext(ruta_mapa)[0]
+    ruta_stat = f"{base}-{heuristica}.stat"
+    if os.path.exists(ruta_stat):
+        os.remove(ruta_stat)
+    orden = [sys.executable, SCRIPT, ruta_mapa, str(heuristica), "--sin-cache"] + opciones
+
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(orden, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    agotado = threading.Event()
+    def matar():
+        agotado.set()
+        proceso.kill()
+    temporizador = threading.Timer(tiempo_limite, matar)
+    temporizador.start()
+    salida = proceso.stdout.read().decode("utf-8", "replace")
+    memoria_kb = None
+    if hasattr(os, "wait4"):
+        _, estado, uso = os.wait4(proceso.pid, 0)
+        proceso.returncode = os.waitstatus_to_exitcode(estado)
+        memoria_kb = uso.ru_maxrss // 1024 if sys.platform == "darwin" else uso.ru_maxrss
+    else:
+        proceso.wait()
+    proceso.stdout.close()
+    temporizador.cancel()
+    tiempo = time.perf_counter() - inicio
+
+    resultado = {"tiempo": round(tiempo, 4), "memoria_kb": memoria_kb}
+    if agotado.is_set():
+        resultado["estado"] = "tiempo agotado"
+    elif proceso.returncode != 0:
+        resultado["estado"] = "error"
+    elif "No se ha encontrado solución" in salida:
+        resultado["estado"] = "sin solución"
+    else:
+        estadisticas = leer_stat(ruta_stat)
+        resultado["estado"] = "ok"
+        resultado["makespan"] = int(estadisticas["Makespan"])
+        resultado["nodos"] = int(estadisticas["Nodos expandidos"])
+        resultado["tiempo_busqueda"] = round(float(estadisticas["Tiempo total"].rstrip("s")), 4)
+    return resultado
+
+def regresion_tests(heuristicas, opciones, tiempo_limite, directorio):
+    # Compara con los .stat guardados en ASTAR-tests
+    regresiones = []
+    for ruta in sorted(glob.glob(os.path.join(DIRECTORIO_TESTS, "mapa*.csv"))):
+        nombre = os.path.splitext(os.path.basename(ruta))[0]
+        copia = os.path.join(directorio, os.path.basename(ruta))
+        shutil.copy(ruta, copia)
+        for heuristica in heuristicas:
+            ruta_stat = os.path.join(DIRECTORIO_TESTS, f"{nombre}-{heuristica}.stat")
+            resultado = ejecutar(copia, heuristica, opciones, tiempo_limite)
+            problemas = []
+            if os.path.exists(ruta_stat):
+                guardado = leer_stat(ruta_stat)
+                if resultado["estado"] != "ok":
+                    problemas.append(resultado["estado"])
+                else:
+                    if resultado["makespan"] != int(guardado["Makespan"]):
+                        problemas.append(f"makespan {resultado['makespan']} (antes {guardado['Makespan']})")
+                    if resultado["nodos"] > int(guardado["Nodos expandidos"]):
+                        problemas.append(f"nodos {resultado['nodos']} (antes {guardado['Nodos expandidos']})")
+            elif resultado["estado"] == "ok":
+                problemas.append("solución en un mapa sin .stat")
+            print(f"{nombre} h{heuristica}: {resultado['estado']}"
+                  + (f" makespan {resultado['makespan']} nodos {resultado['nodos']}" if resultado["estado"] == "ok" else "")
+                  + (f"  REGRESIÓN: {', '.join(problemas)}" if problemas else ""))
+            if problemas:
+                regresiones.append(f"{nombre}-{heuristica}")
+    return regresiones
+
+def comparar(resultado, base, tolerancia):
+    problemas = []
+    if base is None or base["estado"] != "ok":
+        return problemas
+    if resultado["estado"] != "ok":
+        return [resultado["estado"]]
+    if resultado["makespan"] != base["makespan"]:
+        problemas.append(f"makespan {resultado['makespan']} (base {base['makespan']})")
+    if resultado["nodos"] > base["nodos"]:
+        problemas.append(f"nodos {resultado['nodos']} (base {base['nodos']})")
+    if (resultado["tiempo"] > base["tiempo"] * (1 + tolerancia)
+            and resultado["tiempo"] - base["tiempo"] > MARGEN_TIEMPO):
+        problemas.append(f"tiempo {resultado['tiempo']}s (base {base['tiempo']}s)")
+    if (resultado.get("memoria_kb") and base.get("memoria_kb")
+            and resultado["memoria_kb"] > base["memoria_kb"] * (1 + tolerancia)):
+        problemas.append(f"memoria {resultado['memoria_kb']}KB (base {base['memoria_kb']}KB)")
+    return problemas
+
+def escalado(heuristicas, opciones, tiempo_limite, semilla, directorio, linea_base, tolerancia):
+    resultados = {}
+    regresiones = []
+    print(f"{'escenario':<14} {'h':>2} {'estado':<15} {'tiempo':>9} {'nodos':>9} {'memoria':>10} {'makespan':>8}")
+    for escenario in ESCENARIOS:
+        iniciales, finales, mapa = generar_mapa(escenario["filas"], escenario["columnas"], escenario["aviones"],
+                                                escenario["gris"], escenario["amarilla"], escenario["pasillos"],
+                                                semilla)
+        ruta = os.path.join(directorio, f"{escenario['nombre']}.csv")
+        escribir_mapa(ruta, iniciales, finales, mapa)
+        for heuristica in heuristicas:
+            clave = f"{escenario['nombre']}-h{heuristica}"
+            resultado = ejecutar(ruta, heuristica, opciones, tiempo_limite)
+            resultados[clave] = resultado
+            problemas = comparar(resultado, linea_base.get(clave), tolerancia)
+            memoria = f"{resultado['memoria_kb']}KB" if resultado["memoria_kb"] is not None else "-"
+            print(f"{escenario['nombre']:<14} {heuristica:>2} {resultado['estado']:<15} "
+                  f"{resultado['tiempo']:>8.3f}s {resultado.get('nodos', '-'):>9} {memoria:>10} "
+                  f"{resultado.get('makespan', '-'):>8}"
+                  + (f"  REGRESIÓN: {', '.join(problemas)}" if problemas else ""))
+            if problemas:
+                regresiones.append(clave)
+    return resultados, regresiones
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python ASTARBenchmark.py [--heuristicas 1 2 3] [--tiempo-limite S] [opciones]"
+    )
+    parser.add_argument("--heuristicas", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--tiempo-limite", type=float, default=60.0)
+    # Empeoramiento relativo de tiempo o memoria que se marca como regresión
+    parser.add_argument("--tolerancia", type=float, default=0.5)
+    parser.add_argument("--linea-base", default=LINEA_BASE)
+    parser.add_argument("--guardar-linea-base", action="store_true")
+    parser.add_argument("--salida", default=None)
+    parser.add_argument("--sin-escalado", action="store_true")
+    parser.add_argument("--semilla", type=int, default=0)
+    # Opciones que se pasan a ASTARRodaje.py en todas las ejecuciones
+    parser.add_argument("--opciones", default="")
+    args = parser.parse_args()
+    opciones = shlex.split(args.opciones)
+
+    linea_base = {}
+    if os.path.exists(args.linea_base) and not args.guardar_linea_base:
+        with open(args.linea_base, 'r') as f_base:
+            datos_base = json.load(f_base)
+        if datos_base.get("semilla") == args.semilla and datos_base.get("opciones") == args.opciones:
+            linea_base = datos_base["resultados"]
+        else:
+            print("Aviso: la línea base es de otra semilla u opciones, no se compara")
+
+    directorio = tempfile.mkdtemp(prefix="astar-bench-")
+    try:
+        print("Regresión frente a ASTAR-tests:")
+        regresiones = regresion_tests(args.heuristicas, opciones, args.tiempo_limite, directorio)
+        if not args.sin_escalado:
+            print("\nEscalado:")
+            resultados, regresiones_escalado = escalado(args.heuristicas, opciones, args.tiempo_limite,
+                                                        args.semilla, directorio, linea_base, args.tolerancia)
+            regresiones += regresiones_escalado
+            datos = {"semilla": args.semilla, "opciones": args.opciones, "resultados": resultados}
+            if args.salida:
+                with open(args.salida, 'w') as f_out:
+                    json.dump(datos, f_out, indent=2, ensure_ascii=False)
+                    f_out.write("\n")
+            if args.guardar_linea_base:
+                os.makedirs(os.path.dirname(os.path.abspath(args.linea_base)), exist_ok=True)
+                with open(args.linea_base, 'w') as f_base:
+                    json.dump(datos, f_base, indent=2, ensure_ascii=False)
+                    f_base.write("\n")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    if regresiones:
+        print(f"\n{len(regresiones)} regresiones: {', '.join(regresiones)}")
+        sys.exit(1)
+    print("\nSin regresiones.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Cliente de prueba de ASTARServicio.py: envía una petición de planificación
+# y muestra el plan con el formato del .output y las estadísticas.
+#
+# Uso: python ASTARCliente.py <mapa.csv> [--heuristica 2] [--puerto 8765]
+#          [--avion "(3,3) (0,2)" ...] [--repeticiones N]
+# Sin --avion se planifican los aviones del propio mapa.
+
+import sys
+import json
+import time
+import argparse
+from urllib import request
+from urllib.error import HTTPError
+
+def leer_avion(texto):
+    # "(3,3) (0,2)" -> [[3, 3], [0, 2]]
+    parts = texto.replace('(', '').replace(')', '').split()
+    return [list(map(int, parts[0].split(','))), list(map(int, parts[1].split(',')))]
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python ASTARCliente.py <mapa.csv> [--heuristica H] [--avion \"(r,c) (r,c)\" ...]"
+    )
+    parser.add_argument("mapa")
+    parser.add_argument("--heuristica", type=int, default=2)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--avion", action="append", default=[])
+    parser.add_argument("--repeticiones", type=int, default=1)
+    args = parser.parse_args()
+
+    peticion = {"mapa": args.mapa, "heuristica": args.heuristica}
+    if args.avion:
+        peticion["aviones"] = [leer_avion(avion) for avion in args.avion]
+    cuerpo = json.dumps(peticion).encode("utf-8")
+    url = f"http://{args.host}:{args.puerto}/planificar"
+
+    for _ in range(args.repeticiones):
+        inicio = time.monotonic()
+        try:
+            with request.urlopen(request.Request(url, data=cuerpo, headers={"Content-Type": "application/json"})) as r:
+                respuesta = json.loads(r.read())
+        except HTTPError as e:
+            print(f"Error: {json.loads(e.read()).get('error')}")
+            sys.exit(1)
+        duracion = time.monotonic() - inicio
+
+    if respuesta["plan"] is None:
+        print("No se ha encontrado solución")
+    else:
+        for linea in respuesta["plan"]:
+            print(linea)
+    for clave, valor in respuesta["estadisticas"].items():
+        print(f"{clave}: {valor}")
+    print(f"Tiempo de la petición: {duracion:.4f}s")
+
+if __name__ == "__main__":
+    main()
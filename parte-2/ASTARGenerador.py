@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Generador de mapas de rodaje con el formato de ASTAR-tests/mapa*.csv:
+#   número de aviones, una línea "(fila,col) (fila,col)" por avión con su
+#   posición inicial y final, y las filas del mapa con celdas B;A;G.
+#
+# Con la misma semilla y los mismos parámetros el mapa es siempre el mismo.
+#
+# Uso: python ASTARGenerador.py <salida.csv> --filas F --columnas C
+#          --aviones N [--gris 0.15] [--amarilla 0.1] [--pasillos K]
+#          [--semilla S]
+#
+# --pasillos K > 0 da una estructura de pistas: solo son transitables las
+# filas y columnas múltiplo de K (pasillos) y el resto son bloques grises;
+# --gris y --amarilla se aplican después sobre las celdas que quedan.
+# Los inicios y las metas son celdas blancas distintas de la mayor región
+# conexa, así que cada avión puede llegar a su meta (aunque el problema
+# conjunto puede no tener solución).
+
+import sys
+import random
+import argparse
+from collections import deque
+
+def region_mayor(mapa):
+    # Mayor componente conexa (4-vecindad) de celdas transitables
+    filas, columnas = len(mapa), len(mapa[0])
+    vistas = set()
+    mayor = []
+    for inicio_row in range(filas):
+        for inicio_col in range(columnas):
+            if mapa[inicio_row][inicio_col] == 'G' or (inicio_row, inicio_col) in vistas:
+                continue
+            region = [(inicio_row, inicio_col)]
+            vistas.add((inicio_row, inicio_col))
+            queue = deque(region)
+            while queue:
+                row, col = queue.popleft()
+                for dr, dc in ((-1,0), (1,0), (0,-1), (0,1)):
+                    vecino = (row + dr, col + dc)
+                    if (0 <= vecino[0] < filas and 0 <= vecino[1] < columnas
+                            and mapa[vecino[0]][vecino[1]] != 'G' and vecino not in vistas):
+                        vistas.add(vecino)
+                        region.append(vecino)
+                        queue.append(vecino)
+            if len(region) > len(mayor):
+                mayor = region
+    return mayor
+
+def generar_mapa(filas, columnas, aviones, gris=0.15, amarilla=0.1, pasillos=0, semilla=0, intentos=1000):
+    # Devuelve (iniciales, finales, mapa) o lanza ValueError si en `intentos`
+    # mapas no hay 2*aviones celdas blancas conectadas
+    rng = random.Random(semilla)
+    for _ in range(intentos):
+        mapa = []
+        for row in range(filas):
+            fila = []
+            for col in range(columnas):
+                if pasillos > 0 and row % pasillos != 0 and col % pasillos != 0:
+                    fila.append('G')
+                elif rng.random() < gris:
+                    fila.append('G')
+                elif rng.random() < amarilla:
+                    fila.append('A')
+                else:
+                    fila.append('B')
+            mapa.append(fila)
+
+        blancas = sorted(pos for pos in region_mayor(mapa) if mapa[pos[0]][pos[1]] == 'B')
+        if len(blancas) >= 2 * aviones:
+            rng.shuffle(blancas)
+            return blancas[:aviones], blancas[aviones:2 * aviones], mapa
+    raise ValueError("No se ha podido generar un mapa con esos parámetros")
+
+def escribir_mapa(ruta, iniciales, finales, mapa):
+    with open(ruta, 'w') as f_out:
+        f_out.write(f"{len(iniciales)}\n")
+        for (row, col), (row_goal, col_goal) in zip(iniciales, finales):
+            f_out.write(f"({row},{col}) ({row_goal},{col_goal})\n")
+        for fila in mapa:
+            f_out.write(";".join(fila) + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python ASTARGenerador.py <salida.csv> --filas F --columnas C --aviones N [opciones]"
+    )
+    parser.add_argument("salida")
+    parser.add_argument("--filas", type=int, required=True)
+    parser.add_argument("--columnas", type=int, required=True)
+    parser.add_argument("--aviones", type=int, required=True)
+    parser.add_argument("--gris", type=float, default=0.15)
+    parser.add_argument("--amarilla", type=float, default=0.1)
+    parser.add_argument("--pasillos", type=int, default=0)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        iniciales, finales, mapa = generar_mapa(args.filas, args.columnas, args.aviones,
+                                                args.gris, args.amarilla, args.pasillos, args.semilla)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    escribir_mapa(args.salida, iniciales, finales, mapa)
+
+if __name__ == "__main__":
+    main()
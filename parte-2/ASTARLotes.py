@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Ejecución por lotes de ASTARRodaje: resuelve todos los mapas de un
+# directorio con varias heurísticas en un único intérprete por trabajador.
+# Cada mapa se lee una sola vez y los trabajos (mapa, heurística) se reparten
+# entre un pool de procesos; cada trabajo escribe su .output y su .stat igual
+# que "python ASTARRodaje.py <mapa> <num-h>".
+#
+# Uso: python ASTARLotes.py <directorio> [--heuristicas 1 2 3]
+#          [--patron "mapa*.csv"] [--trabajadores N] [opciones de ASTARRodaje]
+
+import os
+import sys
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import ASTARRodaje as rodaje
+
+def resolver_trabajo(trabajo):
+    datos, num_heuristica, opciones = trabajo
+    if (opciones["metricas"] or opciones["progreso"]) and rodaje.metricas is None:
+        rodaje.activar_metricas(opciones["progreso"])
+    plan, estadisticas = rodaje.resolver(datos, num_heuristica, **opciones)
+    if plan is not None:
+        rodaje.escribir_solucion(plan)
+    if plan is not None or "Tiempo total" in estadisticas:
+        rodaje.escribir_estadisticas(estadisticas)
+    if opciones["metricas"]:
+        rodaje.escribir_metricas(estadisticas)
+    return plan is not None, estadisticas.get("Makespan")
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python ASTARLotes.py <directorio> [--heuristicas H ...] [opciones]"
+    )
+    parser.add_argument("directorio")
+    parser.add_argument("--heuristicas", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--patron", default="*.csv")
+    parser.add_argument("--trabajadores", type=int, default=os.cpu_count())
+    args, resto = parser.parse_known_args()
+
+    # El resto de opciones son las de ASTARRodaje y se aplican a todos los trabajos
+    args_busqueda = rodaje.parser.parse_args(["", "0"] + resto)
+    opciones = vars(args_busqueda)
+    del opciones["map_path"], opciones["num_heuristica"]
+    if opciones["procesos"] > 1:
+        print("Error: --procesos no se puede usar en ejecución por lotes.")
+        sys.exit(1)
+    try:
+        rodaje.comprobar_opciones(args_busqueda)
+    except ValueError as e:
+        print(f"Error: {e}.")
+        sys.exit(1)
+
+    if not os.path.isdir(args.directorio):
+        print(f"Error: El directorio {args.directorio} no existe.")
+        sys.exit(1)
+    rutas = sorted(glob.glob(os.path.join(args.directorio, args.patron)))
+    if not rutas:
+        print(f"Error: No se encontraron archivos que coincidan con el patrón {args.patron} en {args.directorio}.")
+        sys.exit(1)
+
+    trabajos = []
+    for ruta in rutas:
+        datos = rodaje.leer_mapa(ruta)
+        for num_heuristica in args.heuristicas:
+            trabajos.append((datos, num_heuristica, opciones))
+
+    with ProcessPoolExecutor(max_workers=args.trabajadores) as pool:
+        for (datos, num_heuristica, _), (resuelto, makespan) in zip(trabajos, pool.map(resolver_trabajo, trabajos)):
+            if resuelto:
+                print(f"{datos.ruta} {num_heuristica}: makespan {makespan}")
+            else:
+                print(f"{datos.ruta} {num_heuristica}: no se ha encontrado solución")
+
+    print("Ejecución completa.")
+
+if __name__ == "__main__":
+    main()
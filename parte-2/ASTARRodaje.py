@@ -3,18 +3,189 @@
 
 import sys
 import time
-from collections import deque
+import os
+import heapq
+import hashlib
+import random
+import json
+import argparse
+import multiprocessing
+from array import array
+from collections import deque, OrderedDict
+
+try:
+    import numpy as np
+except ImportError:  # sin numpy se usa el BFS en Python y no hay caché
+    np = None
+
+try:
+    import resource
+except ImportError:  # sin resource (Windows) no se mide la memoria máxima
+    resource = None
 
 #######################################################################
 # Lectura de argumentos
 #######################################################################
 
-if len(sys.argv) < 3:
-    print("Uso: python ASTARRodaje.py <path mapa.csv> <num-h>")
-    sys.exit(1)
+parser = argparse.ArgumentParser(
+    usage="python ASTARRodaje.py <path mapa.csv> <num-h> [opciones]"
+)
+parser.add_argument("map_path")
+parser.add_argument("num_heuristica", type=int)
+# producto: producto cartesiano de las acciones de todos los aviones.
+# od: descomposición de operadores, un avión por nodo intermedio.
+parser.add_argument("--sucesores", choices=["producto", "od"], default="producto")
+# astar: A* sobre el estado conjunto de todos los aviones.
+# cbs: Conflict-Based Search, un A* espacio-temporal por avión.
+# prioridades: planificación por prioridades con tabla de reservas (rápida,
+#     pero ni óptima ni completa: puede no dar plan aunque lo haya).
+#     --reinicios prueba además órdenes aleatorios (a partir de --semilla),
+#     repartidos entre --procesos procesos. Con --respaldo, si ningún orden
+#     da plan se resuelve con cbs (completo, pero puede tardar mucho más).
+parser.add_argument("--motor", choices=["astar", "cbs", "prioridades"], default="astar")
+parser.add_argument("--reinicios", type=int, default=0)
+parser.add_argument("--semilla", type=int, default=0)
+parser.add_argument("--respaldo", action="store_true")
+# Cota de makespan a partir de la cual cbs e --independencia dejan de buscar
+# (por defecto filas*columnas*aviones)
+parser.add_argument("--max-makespan", type=int, default=None)
+# Detección de independencia: planifica por separado los grupos de aviones
+# que no interactúan (solo con --motor astar)
+parser.add_argument("--independencia", action="store_true")
+# Poda de sucesores con esperas conmutables en el A* conjunto (--sucesores
+# producto): no cambia el makespan y genera menos combinaciones del producto
+# cartesiano, pero no reduce los estados expandidos (pueden ser más)
+parser.add_argument("--poda-sucesores", action="store_true")
+# Lista abierta del A* conjunto:
+# minheap: montículo propio, desempates arbitrarios (por defecto).
+# cubos: cola de cubos indexada por f entero, O(1) por operación.
+# heapq: montículo binario de la librería estándar, admite f no enteros.
+parser.add_argument("--abierta", choices=["minheap", "cubos", "heapq"], default="minheap")
+# Desempate entre nodos con la misma f (cubos y heapq):
+# g: primero los de mayor g (equivale a menor h, ya que f = g + h).
+# fifo: por orden de inserción.
+parser.add_argument("--desempate", choices=["g", "fifo"], default="g")
+# Directorio donde se guardan los campos de distancias (.npy) por mapa y meta
+parser.add_argument("--cache-distancias", default=os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "heuristica", "distancias"))
+parser.add_argument("--sin-cache", action="store_true")
+# Modo anytime (ARA*): primer plan rápido con la heurística inflada por
+# --peso-inicial y mejoras sucesivas bajando el peso en --paso-peso hasta 1.
+# --tiempo-limite (segundos) corta la búsqueda y conserva el mejor plan.
+parser.add_argument("--anytime", action="store_true")
+parser.add_argument("--peso-inicial", type=float, default=3.0)
+parser.add_argument("--paso-peso", type=float, default=0.5)
+parser.add_argument("--tiempo-limite", type=float, default=None)
+# Búsqueda con memoria acotada (IDA*): profundización iterativa sobre f con
+# una tabla de transposición de como mucho --limite-tabla estados, en lugar
+# de guardar todos los estados generados como el A*.
+parser.add_argument("--ida", action="store_true")
+parser.add_argument("--limite-tabla", type=int, default=1000000)
+# A* paralelo (HDA*): cada estado pertenece al proceso que indica su hash;
+# con --procesos 1 (por defecto) se usa el A* secuencial. --lote es el número
+# de expansiones de cada proceso entre dos intercambios de sucesores.
+parser.add_argument("--procesos", type=int, default=1)
+parser.add_argument("--lote", type=int, default=512)
+# Instrumentación: --metricas escribe <mapa>-<num-h>.json junto al .stat con
+# tiempos por fase, contadores y memoria máxima; --progreso S muestra cada S
+# segundos una línea con el avance de la búsqueda (por stderr)
+parser.add_argument("--metricas", action="store_true")
+parser.add_argument("--progreso", type=float, default=None)
+def opciones_busqueda(**opciones):
+    # Namespace como el de parse_args con los valores por defecto de todas las
+    # opciones, cambiando las indicadas por el nombre de su atributo
+    # (p. ej. motor="cbs", max_makespan=20)
+    args_busqueda = parser.parse_args(["", "0"])
+    acciones = {accion.dest: accion for accion in parser._actions}
+    for clave, valor in opciones.items():
+        if clave in ("map_path", "num_heuristica") or not hasattr(args_busqueda, clave):
+            raise TypeError(f"Opción desconocida: {clave}")
+        if not valor_valido(acciones[clave], valor):
+            raise ValueError(f"Valor no válido para la opción {clave}: {valor!r}")
+        setattr(args_busqueda, clave, valor)
+    comprobar_opciones(args_busqueda)
+    return args_busqueda
+
+def valor_valido(accion, valor):
+    # Mismo tipo que daría parse_args: bool para las opciones sin argumento,
+    # número para las de type int/float (None si no tienen valor por defecto)
+    # y uno de los choices si los hay
+    if valor is None:
+        return accion.default is None
+    if accion.nargs == 0:
+        return isinstance(valor, bool)
+    if isinstance(valor, bool):
+        return False
+    if accion.type is int:
+        valido = isinstance(valor, int)
+    elif accion.type is float:
+        valido = isinstance(valor, (int, float))
+    else:
+        valido = isinstance(valor, str)
+    return valido and (accion.choices is None or valor in accion.choices)
+
+# Búsquedas que usan cada opción: cambiarla en otra búsqueda no tendría efecto.
+# astar es el A* conjunto con --sucesores producto y od con --sucesores od
+# (que solo usa el A* conjunto).
+USO_OPCIONES = {
+    "reinicios": ("prioridades",),
+    "semilla": ("prioridades",),
+    "respaldo": ("prioridades",),
+    "max_makespan": ("cbs", "independencia", "prioridades"),
+    "poda_sucesores": ("astar",),
+    "abierta": ("astar",),
+    "desempate": ("astar", "anytime"),
+    "peso_inicial": ("anytime",),
+    "paso_peso": ("anytime",),
+    "tiempo_limite": ("anytime",),
+    "limite_tabla": ("ida",),
+    "lote": ("paralela",),
+}
+
+def comprobar_opciones(opciones):
+    # Lanza ValueError si se piden dos búsquedas a la vez o una opción que la
+    # búsqueda elegida no usa (en lugar de ignorarla sin avisar)
+    busquedas = []
+    if opciones.motor != "astar":
+        busquedas.append((opciones.motor, f"--motor {opciones.motor}"))
+    if opciones.independencia:
+        busquedas.append(("independencia", "--independencia"))
+    if opciones.procesos > 1 and opciones.motor != "prioridades":
+        busquedas.append(("paralela", "--procesos"))
+    if opciones.ida:
+        busquedas.append(("ida", "--ida"))
+    if opciones.anytime:
+        busquedas.append(("anytime", "--anytime"))
+    if len(busquedas) > 1:
+        raise ValueError(f"{busquedas[0][1]} y {busquedas[1][1]} no se pueden combinar")
+    if busquedas:
+        busqueda = busquedas[0][0]
+    else:
+        busqueda = "od" if opciones.sucesores == "od" else "astar"
+    if opciones.sucesores == "od" and busqueda != "od":
+        raise ValueError(f"--sucesores od no se puede combinar con {busquedas[0][1]}")
+    for clave, busquedas_validas in USO_OPCIONES.items():
+        if busqueda not in busquedas_validas and getattr(opciones, clave) != parser.get_default(clave):
+            opcion = "--" + clave.replace("_", "-")
+            if busquedas:
+                donde = busquedas[0][1]
+            else:
+                donde = "--sucesores od" if busqueda == "od" else "el A* conjunto"
+            raise ValueError(f"{opcion} no tiene efecto con {donde}")
+    if (busqueda == "astar" and opciones.abierta == "minheap"
+            and opciones.desempate != parser.get_default("desempate")):
+        # El montículo propio desempata de forma arbitraria
+        raise ValueError("--desempate no tiene efecto con --abierta minheap (usa cubos o heapq)")
+    if busqueda == "prioridades" and opciones.max_makespan is not None and not opciones.respaldo:
+        raise ValueError("--max-makespan solo tiene efecto con --motor prioridades si se usa --respaldo")
 
-map_path = sys.argv[1]
-num_heuristica = int(sys.argv[2])
+# Opciones de la búsqueda en curso (las fija preparar())
+args = opciones_busqueda()
+map_path = None
+num_heuristica = 1
+modo_sucesores = args.sucesores
+motor = args.motor
+independencia = args.independencia
 
 #######################################################################
 # Lectura del mapa y datos
@@ -24,33 +195,60 @@ num_heuristica = int(sys.argv[2])
 # B: Blanca (transitable y se puede esperar)
 # A: Amarilla (transitable, no se puede esperar)
 # G: Gris (no transitable)
-with open(map_path, 'r') as file:
-    lines = [line.strip() for line in file.readlines()]
+class DatosMapa:
+    # Mapa ya leído: posiciones iniciales y finales de cada avión, la rejilla
+    # como lista de filas de celdas ('B', 'A' o 'G') y la ruta del .csv, junto
+    # a la que se escriben el .output y el .stat (None si no viene de fichero)
+    def __init__(self, iniciales, finales, mapa, ruta=None):
+        self.iniciales = [tuple(pos) for pos in iniciales]
+        self.finales = [tuple(pos) for pos in finales]
+        self.mapa = [list(fila) for fila in mapa]
+        self.ruta = ruta
 
-num_aviones = int(lines[0])
-aviones_data = lines[1:num_aviones+1]
-map_data = lines[num_aviones+1:]
+    def con_aviones(self, iniciales, finales):
+        # Mismo mapa con otros aviones; comparte la rejilla, así que preparar()
+        # no la vuelve a compilar si es la de la búsqueda anterior
+        datos = DatosMapa(iniciales, finales, [])
+        datos.mapa = self.mapa
+        return datos
 
-# Destinos:
-iniciales = []
-finales = []
+def leer_mapa(ruta):
+    with open(ruta, 'r') as file:
+        lines = [line.strip() for line in file.readlines()]
+
+    num_aviones = int(lines[0])
+    aviones_data = lines[1:num_aviones+1]
+    map_data = lines[num_aviones+1:]
+
+    # Destinos:
+    iniciales = []
+    finales = []
+
+    for i, line in enumerate(aviones_data):
+        # Ejemplo: "(3,3) (0,2)"
+        parts = line.replace('(', '').replace(')', '').split()
+        # parts = ["3,3", "0,2"]
+        init = tuple(map(int, parts[0].split(',')))
+        goal = tuple(map(int, parts[1].split(',')))
+        iniciales.append(init)
+        finales.append(goal)
 
-for i, line in enumerate(aviones_data):
-    # Ejemplo: "(3,3) (0,2)"
-    parts = line.replace('(', '').replace(')', '').split()
-    # parts = ["3,3", "0,2"]
-    init = tuple(map(int, parts[0].split(',')))
-    goal = tuple(map(int, parts[1].split(',')))
-    iniciales.append(init)
-    finales.append(goal)
+    mapa = []
+    for row in map_data:
+        # Cada fila podría tener formato: "B;B;B;B"
+        mapa.append(row.split(';'))
 
+    return DatosMapa(iniciales, finales, mapa, ruta)
+
+# Mapa de la búsqueda en curso (los fija preparar())
+iniciales = []
+finales = []
 mapa = []
-for row in map_data:
-    # Cada fila podría tener formato: "B;B;B;B"
-    mapa.append(row.split(';'))
+rows = 0
+cols = 0
 
-rows = len(mapa)
-cols = len(mapa[0])
+# Estadísticas adicionales que se añaden al fichero .stat
+estadisticas_extra = {}
 
 #######################################################################
 # Funciones auxiliares
@@ -63,13 +261,59 @@ def puede_esperar(celda):
     # Se puede esperar en B (blanca), no en A (amarilla)
     return celda == 'B'
 
+#######################################################################
+# Modelo compilado de la rejilla
+#######################################################################
+
+# Se construye una sola vez tras leer el mapa para que las expansiones no
+# vuelvan a recorrer el mapa de cadenas. Cada celda es un índice
+# row*cols+col y se guardan:
+#   tipo_celda[c]: GRIS, AMARILLA o BLANCA (bytearray)
+#   inicio_vecinos[c]:inicio_vecinos[c+1]: tramo de vecinos_celda con los
+#       vecinos transitables de c (formato CSR), en orden arriba, abajo,
+#       izquierda, derecha
+#   posicion_celda[c]: la tupla (row, col), compartida por todos los estados
+#   acciones_celda[c]: tupla de posiciones destino desde c (moverse a cada
+#       vecino y, si es blanca, esperar)
+GRIS, AMARILLA, BLANCA = 0, 1, 2
+
+def compilar_rejilla():
+    global num_celdas, tipo_celda, posicion_celda, inicio_vecinos, vecinos_celda, acciones_celda
+    num_celdas = rows * cols
+    tipo_celda = bytearray(num_celdas)
+    for row in range(rows):
+        for col in range(cols):
+            if puede_esperar(mapa[row][col]):
+                tipo_celda[row * cols + col] = BLANCA
+            elif es_transitable(mapa[row][col]):
+                tipo_celda[row * cols + col] = AMARILLA
+
+    posicion_celda = [(row, col) for row in range(rows) for col in range(cols)]
+
+    inicio_vecinos = array('i', [0])
+    vecinos_celda = array('i')
+    for row in range(rows):
+        for col in range(cols):
+            # Movimientos: arriba, abajo, izquierda, derecha
+            for dr, dc in ((-1,0), (1,0), (0,-1), (0,1)):
+                vecino_row, vecino_col = row+dr, col+dc
+                if 0 <= vecino_row < rows and 0 <= vecino_col < cols:
+                    vecino = vecino_row * cols + vecino_col
+                    if tipo_celda[vecino] != GRIS:
+                        vecinos_celda.append(vecino)
+            inicio_vecinos.append(len(vecinos_celda))
+
+    acciones_celda = []
+    for celda in range(num_celdas):
+        destinos = [posicion_celda[v] for v in vecinos_celda[inicio_vecinos[celda]:inicio_vecinos[celda+1]]]
+        if tipo_celda[celda] == BLANCA:
+            destinos.append(posicion_celda[celda])
+        acciones_celda.append(tuple(destinos))
+
 def vecinos(row, col):
-    # Movimientos: arriba, abajo, izquierda, derecha
-    direcciones = [(-1,0), (1,0), (0,-1), (0,1)]
-    for dr, dc in direcciones:
-        vecino_row, vecino_col = row+dr, col+dc
-        if 0 <= vecino_row < rows and 0 <= vecino_col < cols and es_transitable(mapa[vecino_row][vecino_col]):
-            yield vecino_row, vecino_col
+    celda = row * cols + col
+    for vecino in vecinos_celda[inicio_vecinos[celda]:inicio_vecinos[celda+1]]:
+        yield posicion_celda[vecino]
 
 #######################################################################
 # Heurísticas
@@ -86,32 +330,149 @@ def heuristica_1(estado):
     return distancia
 
 # Heurística 2: Distancia real más corta ignorando otros aviones.
-# Precalcular la distancia mínima para cada avión a su meta
+# Precalcular la distancia mínima para cada avión a su meta.
+#
+# distancias_min[i][row*cols+col] = distancia del (row,col) a la meta del
+# avión i, o SIN_CAMINO si desde ahí no se llega. Cada campo es un array
+# denso de int32 (memoryview sobre el array de numpy, que puede estar mapeado
+# en memoria desde la caché, o array('i') sin numpy): indexarlo devuelve un
+# int de Python y ocupa 4 bytes por celda.
+#
+# Con numpy, los campos se guardan en --cache-distancias como
+# <huella del mapa>-<celda meta>.npy y en las siguientes ejecuciones sobre el
+# mismo mapa se cargan con mmap en lugar de repetir el BFS.
+#
+# Un proceso de larga duración (ASTARServicio.py) puede además guardar los
+# campos en memoria con activar_cache_memoria(capacidad): un LRU indexado por
+# (huella del mapa, celda meta) que se consulta antes que la caché en disco.
+SIN_CAMINO = 2**31 - 1
 distancias_min = []
+cache_memoria = None
+capacidad_cache_memoria = 0
+
+huella_mapa = None
+
+def bfs_distancias(celda_goal):
+    # BFS en Python sobre la tabla de vecinos compilada.
+    dist = array('i', [SIN_CAMINO]) * num_celdas
+    queue = deque()
+    dist[celda_goal] = 0
+    queue.append(celda_goal)
+    while queue:
+        celda = queue.popleft()
+        d = dist[celda] + 1
+        for vecino in vecinos_celda[inicio_vecinos[celda]:inicio_vecinos[celda+1]]:
+            if dist[vecino] == SIN_CAMINO:
+                dist[vecino] = d
+                queue.append(vecino)
+    return dist
+
+def tabla_vecinos_numpy():
+    # tabla[c] = índices de los 4 vecinos transitables de c, -1 si no hay
+    indices = np.arange(num_celdas, dtype=np.int32).reshape(rows, cols)
+    transitable = np.frombuffer(bytes(tipo_celda), dtype=np.uint8).reshape(rows, cols) != GRIS
+    tabla = np.full((rows, cols, 4), -1, dtype=np.int32)
+    tabla[1:, :, 0] = np.where(transitable[:-1, :], indices[:-1, :], -1)
+    tabla[:-1, :, 1] = np.where(transitable[1:, :], indices[1:, :], -1)
+    tabla[:, 1:, 2] = np.where(transitable[:, :-1], indices[:, :-1], -1)
+    tabla[:, :-1, 3] = np.where(transitable[:, 1:], indices[:, 1:], -1)
+    return tabla.reshape(num_celdas, 4)
+
+def bfs_distancias_numpy(celda_goal, tabla):
+    # Frente de onda vectorizado: en cada paso se expanden a la vez todas las
+    # celdas del frente y se quedan las no visitadas.
+    dist = np.full(num_celdas, SIN_CAMINO, dtype=np.int32)
+    dist[celda_goal] = 0
+    frente = np.array([celda_goal], dtype=np.int32)
+    d = 0
+    while frente.size:
+        d += 1
+        siguientes = tabla[frente].ravel()
+        siguientes = siguientes[siguientes >= 0]
+        siguientes = np.unique(siguientes[dist[siguientes] == SIN_CAMINO])
+        dist[siguientes] = d
+        frente = siguientes
+    return dist
+
+def activar_cache_memoria(capacidad):
+    global cache_memoria, capacidad_cache_memoria
+    cache_memoria = OrderedDict()
+    capacidad_cache_memoria = capacidad
+
+def distancias_en_memoria(celda_goal):
+    if cache_memoria is None:
+        return None
+    dist = cache_memoria.get((huella_mapa, celda_goal))
+    if dist is not None:
+        cache_memoria.move_to_end((huella_mapa, celda_goal))
+    return dist
+
+def guardar_en_memoria(celda_goal, dist):
+    if cache_memoria is None:
+        return
+    cache_memoria[(huella_mapa, celda_goal)] = dist
+    while len(cache_memoria) > capacidad_cache_memoria:
+        cache_memoria.popitem(last=False)
+
 def precalcular_distancias():
-    # Usaremos BFS para cada meta.
-    # distancias_min[i][row][col] = distancia del (row,col) a la meta del avión i
-    for i, goal in enumerate(finales):
-        dist_map = [[float('inf')]*cols for _ in range(rows)]
-        queue = deque()
-        row_goal, col_goal = goal
-        dist_map[row_goal][col_goal] = 0
-        queue.append((row_goal, col_goal))
-        while queue:
-            row, col = queue.popleft()
-            for vecino_row, vecino_col in vecinos(row,col):
-                if dist_map[vecino_row][vecino_col] == float('inf'):
-                    dist_map[vecino_row][vecino_col] = dist_map[row][col] + 1
-                    queue.append((vecino_row,vecino_col))
-        distancias_min.append(dist_map)
+    desde_memoria = 0
+    if np is None:
+        for row_goal, col_goal in finales:
+            celda_goal = row_goal * cols + col_goal
+            dist = distancias_en_memoria(celda_goal)
+            if dist is None:
+                dist = bfs_distancias(celda_goal)
+                guardar_en_memoria(celda_goal, dist)
+            else:
+                desde_memoria += 1
+            distancias_min.append(dist)
+        if cache_memoria is not None:
+            estadisticas_extra["Distancias desde memoria"] = f"{desde_memoria}/{len(finales)}"
+        return
+
+    usar_cache = not args.sin_cache
+    if usar_cache:
+        os.makedirs(args.cache_distancias, exist_ok=True)
+    tabla = None
+    desde_cache = 0
+    for row_goal, col_goal in finales:
+        celda_goal = row_goal * cols + col_goal
+        dist = distancias_en_memoria(celda_goal)
+        if dist is not None:
+            desde_memoria += 1
+            distancias_min.append(dist)
+            continue
+        ruta = os.path.join(args.cache_distancias, f"{huella_mapa}-{celda_goal}.npy")
+        if usar_cache and os.path.exists(ruta):
+            try:
+                dist = np.load(ruta, mmap_mode='r')
+                desde_cache += 1
+            except (OSError, ValueError):
+                dist = None
+        if dist is None:
+            if tabla is None:
+                tabla = tabla_vecinos_numpy()
+            dist = bfs_distancias_numpy(celda_goal, tabla)
+            if usar_cache:
+                # Escritura atómica: otros procesos pueden estar leyendo la caché
+                tmp = f"{ruta}.{os.getpid()}.tmp"
+                with open(tmp, 'wb') as f_cache:
+                    np.save(f_cache, dist)
+                os.replace(tmp, ruta)
+        dist = memoryview(dist)
+        guardar_en_memoria(celda_goal, dist)
+        distancias_min.append(dist)
+    estadisticas_extra["Distancias desde caché"] = f"{desde_cache}/{len(finales)}"
+    if cache_memoria is not None:
+        estadisticas_extra["Distancias desde memoria"] = f"{desde_memoria}/{len(finales)}"
 
 def heuristica_2(estado):
     # Se asume que distancias_min ya está computada.
     distancia = 0
     # distancia del (row, col) a la meta del avión i
     for i, (row, col) in enumerate(estado):
-        dist_min = distancias_min[i][row][col]
-        if dist_min == float('inf'):
+        dist_min = distancias_min[i][row * cols + col]
+        if dist_min == SIN_CAMINO:
             # Si es inalcanzable, heurística puede ser muy alta
             # Esto podría pasar si no hay camino, en cuyo caso no existe solución.
             return float('inf')
@@ -119,8 +480,124 @@ def heuristica_2(estado):
             distancia = dist_min
     return distancia
 
-if num_heuristica == 2:
-    precalcular_distancias()
+# Heurística 3: bases de datos de patrones (PDB) por parejas de aviones.
+# heuristica_1 y heuristica_2 toman el máximo sobre aviones sueltos e ignoran
+# que dos aviones pueden tener que cederse el paso. Para cada pareja (i, j)
+# cuyas regiones del mapa se solapan se precalcula el makespan óptimo exacto
+# de la pareja sola desde cualquier par de posiciones hasta sus metas. El
+# makespan del problema completo es al menos el de cualquier pareja, así que
+# el máximo de heuristica_2 y de las parejas es admisible (y consistente).
+#
+# - La tabla de una pareja solo depende de sus metas: se obtiene con un BFS
+#   hacia atrás desde (meta_i, meta_j) sobre el espacio de parejas de celdas
+#   transitables (las transiciones son simétricas: mismas acciones, mismas
+#   reglas de colisión e intercambio que generan_conflicto).
+# - La región de un avión son las celdas de sus caminos casi mínimos (como
+#   mucho HOLGURA_REGION pasos más largos que el mínimo).
+# - Las tablas se construyen la primera vez que se evalúa la heurística, se
+#   guardan en la caché de distancias y solo para parejas con a lo sumo
+#   LIMITE_ESTADOS_PAREJA estados. Requiere numpy.
+HOLGURA_REGION = 2
+LIMITE_ESTADOS_PAREJA = 4000000
+SIN_CAMINO_PAREJA = 2**16 - 1
+parejas_pdb = []
+pdb_construidas = False
+
+def bfs_pareja(meta_i, meta_j, acciones):
+    # acciones[c] = destinos (índices compactos) desde c, -1 de relleno
+    m = len(acciones)
+    dist = np.full(m * m, SIN_CAMINO_PAREJA, dtype=np.uint16)
+    dist[meta_i * m + meta_j] = 0
+    frente_i = np.array([meta_i], dtype=np.int64)
+    frente_j = np.array([meta_j], dtype=np.int64)
+    d = 0
+    while frente_i.size and d < SIN_CAMINO_PAREJA - 1:
+        d += 1
+        destinos_i, destinos_j = np.broadcast_arrays(acciones[frente_i][:, :, None],
+                                                     acciones[frente_j][:, None, :])
+        intercambio = (destinos_i == frente_j[:, None, None]) & (destinos_j == frente_i[:, None, None])
+        valido = (destinos_i >= 0) & (destinos_j >= 0) & (destinos_i != destinos_j) & ~intercambio
+        claves = destinos_i[valido].astype(np.int64) * m + destinos_j[valido]
+        claves = np.unique(claves[dist[claves] == SIN_CAMINO_PAREJA])
+        dist[claves] = d
+        frente_i, frente_j = np.divmod(claves, m)
+    return dist
+
+def construir_pdb():
+    global pdb_construidas, indice_compacto, num_compactas
+    pdb_construidas = True
+    if np is None:
+        print("La heurística 3 requiere numpy")
+        sys.exit(1)
+
+    # Índices compactos de las celdas transitables
+    transitables = [c for c in range(num_celdas) if tipo_celda[c] != GRIS]
+    num_compactas = len(transitables)
+    indice_compacto = array('i', [-1]) * num_celdas
+    for k, c in enumerate(transitables):
+        indice_compacto[c] = k
+    if num_compactas * num_compactas > LIMITE_ESTADOS_PAREJA:
+        estadisticas_extra["Parejas en PDB"] = 0
+        return
+    acciones = np.full((num_compactas, 5), -1, dtype=np.int64)
+    for k, c in enumerate(transitables):
+        for a, (row, col) in enumerate(acciones_celda[c]):
+            acciones[k, a] = indice_compacto[row * cols + col]
+
+    # Regiones: celdas con d(inicio, c) + d(c, meta) <= d(inicio, meta) + holgura
+    tabla = tabla_vecinos_numpy()
+    regiones = []
+    for i, (row, col) in enumerate(iniciales):
+        desde_inicio = bfs_distancias_numpy(row * cols + col, tabla).astype(np.int64)
+        hasta_meta = np.asarray(distancias_min[i], dtype=np.int64)
+        minimo = hasta_meta[row * cols + col]
+        regiones.append((desde_inicio + hasta_meta) <= minimo + HOLGURA_REGION)
+
+    usar_cache = not args.sin_cache
+    if usar_cache:
+        os.makedirs(args.cache_distancias, exist_ok=True)
+    n = len(iniciales)
+    for i in range(n):
+        for j in range(i + 1, n):
+            if not (regiones[i] & regiones[j]).any():
+                continue
+            meta_i = indice_compacto[finales[i][0] * cols + finales[i][1]]
+            meta_j = indice_compacto[finales[j][0] * cols + finales[j][1]]
+            if meta_i < 0 or meta_j < 0:
+                continue
+            ruta = os.path.join(args.cache_distancias, f"{huella_mapa}-pareja-{meta_i}-{meta_j}.npy")
+            dist = None
+            if usar_cache and os.path.exists(ruta):
+                try:
+                    dist = np.load(ruta, mmap_mode='r')
+                except (OSError, ValueError):
+                    dist = None
+            if dist is None:
+                dist = bfs_pareja(meta_i, meta_j, acciones)
+                if usar_cache:
+                    tmp = f"{ruta}.{os.getpid()}.tmp"
+                    with open(tmp, 'wb') as f_cache:
+                        np.save(f_cache, dist)
+                    os.replace(tmp, ruta)
+            parejas_pdb.append((i, j, memoryview(dist)))
+    estadisticas_extra["Parejas en PDB"] = len(parejas_pdb)
+
+def heuristica_3(estado):
+    if not pdb_construidas:
+        construir_pdb()
+    distancia = heuristica_2(estado)
+    if distancia == float('inf'):
+        return distancia
+    for i, j, dist in parejas_pdb:
+        row_i, col_i = estado[i]
+        row_j, col_j = estado[j]
+        clave = indice_compacto[row_i * cols + col_i] * num_compactas + indice_compacto[row_j * cols + col_j]
+        dist_pareja = dist[clave]
+        if dist_pareja == SIN_CAMINO_PAREJA:
+            return float('inf')
+        if dist_pareja > distancia:
+            distancia = dist_pareja
+    return distancia
 
 ###############################################################################
 # Implementación de una estructura de min-heap sin usar heapq
@@ -128,12 +605,15 @@ if num_heuristica == 2:
 class MinHeap:
     def __init__(self):
         self.data = []  # almacenará tuplas del tipo (f, g, state, parent)
+        self.inserciones = 0
+        self.extracciones = 0
     
     def __len__(self):
         return len(self.data)
     
     def push(self, element):
         # element es una tupla (f, g, state, parent)
+        self.inserciones += 1
         self.data.append(element)
         self._sift_up(len(self.data)-1)
     
@@ -141,6 +621,7 @@ class MinHeap:
         # Extrae el elemento con menor f
         if not self.data:
             return None
+        self.extracciones += 1
         # Intercambiamos el primer con el último
         self._swap(0, len(self.data)-1)
         elem = self.data.pop()  # ahora elem es el que era el root
@@ -177,6 +658,112 @@ class MinHeap:
     def _swap(self, i, j):
         self.data[i], self.data[j] = self.data[j], self.data[i]
 
+###############################################################################
+# Listas abiertas alternativas (--abierta cubos | heapq)
+###############################################################################
+# Misma interfaz que MinHeap: push/pop de tuplas (f, g, state, parent) y
+# contadores de inserciones y extracciones.
+
+class ColaCubos:
+    # Todos los costes son enteros unitarios, así que f es un entero pequeño y
+    # se puede indexar directamente: cubos[f] agrupa los nodos con esa f. Con
+    # desempate por g, cada cubo es una lista indexada por g de pilas y se
+    # extrae de la mayor g; con fifo, cada cubo es una cola.
+    # Las f infinitas (heurística 2 sin camino) van a un cubo aparte, el último.
+    def __init__(self, desempate="g"):
+        self.desempate = desempate
+        self.cubos = {}
+        self.infinitos = deque()
+        self.f_min = None
+        self.tam = 0
+        self.inserciones = 0
+        self.extracciones = 0
+
+    def __len__(self):
+        return self.tam
+
+    def push(self, element):
+        self.inserciones += 1
+        self.tam += 1
+        f = element[0]
+        if f == float('inf'):
+            self.infinitos.append(element)
+            return
+        cubo = self.cubos.get(f)
+        if cubo is None:
+            cubo = [] if self.desempate == "g" else deque()
+            self.cubos[f] = cubo
+            if self.f_min is None or f < self.f_min:
+                self.f_min = f
+        if self.desempate == "g":
+            g = element[1]
+            while len(cubo) <= g:
+                cubo.append([])
+            cubo[g].append(element)
+        else:
+            cubo.append(element)
+
+    def pop(self):
+        if self.tam == 0:
+            return None
+        self.extracciones += 1
+        self.tam -= 1
+        if not self.cubos:
+            return self.infinitos.popleft()
+        # f_min siempre apunta a un cubo no vacío
+        cubo = self.cubos[self.f_min]
+        if self.desempate == "g":
+            elem = cubo[-1].pop()
+            while cubo and not cubo[-1]:
+                cubo.pop()
+        else:
+            elem = cubo.popleft()
+        if not cubo:
+            del self.cubos[self.f_min]
+            if self.cubos:
+                # Con heurística consistente la siguiente f suele ser f_min + 1
+                f = self.f_min + 1
+                while f not in self.cubos:
+                    f += 1
+                self.f_min = f
+            else:
+                self.f_min = None
+        return elem
+
+class ColaHeapq:
+    # Montículo binario de heapq para f no enteras. El contador evita comparar
+    # los estados y fija el orden de inserción entre empates.
+    def __init__(self, desempate="g"):
+        self.desempate = desempate
+        self.data = []
+        self.contador = 0
+        self.inserciones = 0
+        self.extracciones = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def push(self, element):
+        self.inserciones += 1
+        self.contador += 1
+        if self.desempate == "g":
+            heapq.heappush(self.data, (element[0], -element[1], self.contador, element))
+        else:
+            heapq.heappush(self.data, (element[0], self.contador, element))
+
+    def pop(self):
+        if not self.data:
+            return None
+        self.extracciones += 1
+        return heapq.heappop(self.data)[-1]
+
+def crear_lista_abierta():
+    if args.abierta == "cubos":
+        return ColaCubos(args.desempate)
+    if args.abierta == "heapq":
+        return ColaHeapq(args.desempate)
+    return MinHeap()
+
 #######################################################################
 # Estado y búsqueda A*
 #######################################################################
@@ -187,25 +774,36 @@ class MinHeap:
 #
 # visited: set de posiciones de aviones sin tiempo -> para evitar ciclos.
 
-estado_inicial = tuple(iniciales)
-goal_posiciones = tuple(finales)
+estado_inicial = ()
+goal_posiciones = ()
 
 def es_objetivo(estado):
     return estado == goal_posiciones
 
+# Representación compacta del estado para la lista abierta, visited y parents:
+# cada celda es un índice row*cols+col y el estado conjunto se empaqueta en un
+# único entero en base rows*cols (el avión 0 en la cifra menos significativa).
+# Un entero ocupa mucho menos que una tupla de tuplas y se hashea más rápido;
+# solo se decodifica el estado que se expande y el camino final.
+def codificar_estado(estado):
+    codigo = 0
+    for row, col in reversed(estado):
+        codigo = codigo * num_celdas + row * cols + col
+    return codigo
+
+def decodificar_estado(codigo, n):
+    estado = []
+    for _ in range(n):
+        codigo, celda = divmod(codigo, num_celdas)
+        estado.append(posicion_celda[celda])
+    return tuple(estado)
+
 def acciones_avion(posicion):
     # posicion: (row,col)
-    # Acciones: moverse a vecinos o esperar.
-    # Esperar solo si puede esperar en esta celda
+    # Acciones: moverse a vecinos o esperar (solo si puede esperar en esta
+    # celda). Están precalculadas por celda en acciones_celda.
     row, col = posicion
-    possible = []
-    # Moverse a vecinos
-    for vecino_row, vecino_col in vecinos(row,col):
-        possible.append((vecino_row,vecino_col))
-    # Esperar
-    if puede_esperar(mapa[row][col]):
-        possible.append((row,col))
-    return possible
+    return acciones_celda[row * cols + col]
 
 def generan_conflicto(estado_anterior, estado_nuevo):
     # Verifica colisiones:
@@ -228,11 +826,15 @@ def generan_conflicto(estado_anterior, estado_nuevo):
                 return True
     return False
 
-def obtener_sucesores(estado):
+def obtener_sucesores(estado, esperaron=0):
     # estado: ((row1, col1), (row2, col2),...)
+    # esperaron: máscara de aviones cuyas acciones se podan (--poda-sucesores,
+    # ver acciones_podadas)
     # Generar todas las combinaciones de acciones.
     aviones_posiciones = list(estado)
     acciones = [acciones_avion(posicion) for posicion in aviones_posiciones]
+    if esperaron:
+        acciones = acciones_podadas(estado, acciones, esperaron)
 
     # Generar el producto cartesiano de acciones
     # Para evitar explosión, se puede hacer de forma incremental
@@ -243,52 +845,317 @@ def obtener_sucesores(estado):
         if not generan_conflicto(estado, estado_nuevo):
             yield estado_nuevo
 
+# Poda de esperas conmutables (--poda-sucesores). Si un avión i esperó en el
+# último paso y ahora se mueve a una celda blanca c que está libre, el mismo
+# estado se alcanza con el mismo coste moviéndose primero y esperando
+# después en c: el paso intermedio alternativo no tiene conflictos (c estaba
+# libre, nadie puede cambiarse con i porque su celda seguía ocupada por él y
+# después i está quieto). Repitiendo ese intercambio cualquier plan óptimo se lleva a
+# uno con las esperas lo más tarde posible, que no se poda, así que la poda
+# conserva el makespan óptimo. Es lo que más recorta con aviones aparcados
+# en su meta: solo pueden salir de ella justo cuando llegan o en el paso en
+# que otro avión deja libre la celda a la que van, en lugar de en cualquier
+# instante.
+#
+# La regla depende del paso por el que se llega al estado (qué aviones
+# esperaron), así que el A* guarda esa máscara por estado. Si un estado se
+# alcanza con el mismo g por otro paso, se queda la intersección de las
+# máscaras (poda menos) y, si ya se había expandido, se vuelve a expandir.
+#
+# Es una poda de sucesores, no de estados: los estados alcanzables son los
+# mismos (todo estado tiene un camino sin esperas podables con su g óptima) y
+# visited ya junta los órdenes que llevan al mismo estado, así que el A*
+# tiene que expandir igualmente todos los estados con f < makespan óptimo.
+# Lo que se ahorra son combinaciones del producto cartesiano: comprobaciones
+# de conflictos, codificaciones y evaluaciones de la heurística de sucesores
+# repetidos. Los nodos expandidos pueden subir, por las reexpansiones al
+# reducir la máscara de un estado y por los empates en f (en mapa10 con h1,
+# 703 sin poda y 1142 con ella). Los aviones aparcados en su meta no tienen
+# una regla propia: solo se benefician de esta cuando esperan en ella.
+
+def mascara_esperas(estado, estado_nuevo):
+    mascara = 0
+    for i, (anterior, nueva) in enumerate(zip(estado, estado_nuevo)):
+        if anterior == nueva:
+            mascara |= 1 << i
+    return mascara
+
+def acciones_podadas(estado, acciones, esperaron):
+    # Quita a los aviones de esperaron los movimientos a celdas blancas libres
+    # antes de formar el producto cartesiano
+    podadas = list(acciones)
+    for i, posicion in enumerate(estado):
+        if esperaron >> i & 1:
+            podadas[i] = [destino for destino in acciones[i]
+                          if destino == posicion or destino in estado
+                          or tipo_celda[destino[0] * cols + destino[1]] != BLANCA]
+    return podadas
+
+def combinaciones(estado, esperaron=0):
+    # Tamaño del producto cartesiano de acciones (con la poda de esperaron)
+    acciones = [acciones_avion(posicion) for posicion in estado]
+    if esperaron:
+        acciones = acciones_podadas(estado, acciones, esperaron)
+    total = 1
+    for lista in acciones:
+        total *= len(lista)
+    return total
+
 def heuristica(estado):
+    if num_heuristica == 3:
+        return heuristica_3(estado)
     if num_heuristica == 2:
         return heuristica_2(estado)
     return heuristica_1(estado)
 
+def heuristica_avion(i, posicion):
+    # Cota inferior de los pasos que le quedan al avión i desde posicion.
+    # heuristica_1 y heuristica_2 son el máximo de este valor sobre los aviones
+    # (con la heurística 3, que no se descompone por aviones, se usa la 2).
+    row, col = posicion
+    if num_heuristica in (2, 3):
+        dist_min = distancias_min[i][row * cols + col]
+        if dist_min == SIN_CAMINO:
+            return float('inf')
+        return dist_min
+    row_goal, col_goal = finales[i]
+    return abs(row - row_goal) + abs(col - col_goal)
+
+#######################################################################
+# Descomposición de operadores (--sucesores od)
+#######################################################################
+
+# En lugar de expandir el producto cartesiano de acciones, cada paso de
+# tiempo se descompone en n movimientos individuales: el nodo intermedio
+# (base, parcial) indica que los aviones 0..len(parcial)-1 ya se han movido
+# desde las posiciones de base y el resto siguen en base. Las colisiones e
+# intercambios se comprueban al mover cada avión contra los que ya se han
+# movido, y el estado completo solo se genera cuando se mueve el último.
+#
+# Todo el paso cuesta 1 (makespan), así que los nodos intermedios comparten
+# g con su base y su f anticipa el coste del estado completo:
+#   f = g + 1 + max(h_i(nueva) de los movidos, h_i(base) - 1 de los pendientes)
+# que es admisible y no decrece hacia los hijos. Como hay muchos empates en f,
+# la prioridad en el heap es (f, -g, -k): se prefieren los nodos más profundos
+# y, dentro del mismo paso, los que tienen más aviones ya movidos.
+
+def movimiento_valido(base, parcial, destino):
+    # El avión k = len(parcial) quiere ir de base[k] a destino.
+    origen = base[len(parcial)]
+    for j, pos_j in enumerate(parcial):
+        # Misma celda que un avión ya movido
+        if pos_j == destino:
+            return False
+        # Intercambio con un avión ya movido
+        if pos_j == origen and base[j] == destino:
+            return False
+    return True
+
+def f_intermedio(g, base, parcial, indices):
+    # indices[k] es el avión que ocupa la posición k del estado
+    cota = 0
+    for k, pos in enumerate(parcial):
+        h_k = heuristica_avion(indices[k], pos)
+        if h_k > cota:
+            cota = h_k
+    for k in range(len(parcial), len(base)):
+        h_k = heuristica_avion(indices[k], base[k]) - 1
+        if h_k > cota:
+            cota = h_k
+    return g + 1 + cota
+
+def heuristica_grupo(estado, indices):
+    cota = 0
+    for k, pos in enumerate(estado):
+        h_k = heuristica_avion(indices[k], pos)
+        if h_k > cota:
+            cota = h_k
+    return cota
+
+def busqueda_od(indices, horizonte=None, reservas=None, limite_nodos=None):
+    # A* con descomposición de operadores sobre los aviones de indices.
+    # Si se da horizonte, el plan debe llegar a las metas exactamente en el
+    # instante horizonte (el tiempo pasa a formar parte de la clave del nodo).
+    # reservas (solo con horizonte) es un par (celdas, arcos) de (celda, t) y
+    # (a, b, t) ocupados por otros aviones que el plan no puede usar.
+    # Si se expanden más de limite_nodos nodos se abandona la búsqueda.
+    # Devuelve (plan, makespan, nodos_expandidos); plan es None si no hay.
+    start = tuple(iniciales[i] for i in indices)
+    metas = tuple(finales[i] for i in indices)
+    n = len(start)
+
+    def clave_nodo(base, parcial, g):
+        if horizonte is None:
+            return (base, parcial)
+        return (base, parcial, g)
+
+    def prioridad(f, g, k):
+        if horizonte is None:
+            return (f, -g, -k)
+        # Con horizonte todos los planes cuestan lo mismo: se profundiza primero
+        return (-g, -k, f)
+
+    # Los nodos de la lista abierta son (prioridad, g, base, parcial); los
+    # estados completos se representan con parcial == ().
+    open_list = MinHeap()
+    open_list.push((prioridad(heuristica_grupo(start, indices), 0, 0), 0, start, ()))
+    inicial = clave_nodo(start, (), 0)
+    mejor_g = {inicial: 0}
+    parents = {inicial: None}
+
+    nodos_expandidos = 0
+
+    while len(open_list) > 0:
+        _, g, base, parcial = open_list.pop()
+        clave = clave_nodo(base, parcial, g)
+        if g > mejor_g[clave]:
+            # Entrada obsoleta: el nodo ya se alcanzó con menor coste
+            continue
+        nodos_expandidos += 1
+        if limite_nodos is not None and nodos_expandidos > limite_nodos:
+            break
+
+        if not parcial and base == metas and (horizonte is None or g == horizonte):
+            path = []
+            while clave is not None:
+                path.append(clave[0])
+                clave = parents[clave]
+            path.reverse()
+            plan = [list(trayectoria) for trayectoria in zip(*path)]
+            return plan, g, nodos_expandidos
+
+        k = len(parcial)
+        for destino in acciones_avion(base[k]):
+            if not movimiento_valido(base, parcial, destino):
+                continue
+            if reservas is not None:
+                celdas, arcos = reservas
+                if (destino, g + 1) in celdas or (destino, base[k], g + 1) in arcos:
+                    continue
+            nuevo_parcial = parcial + (destino,)
+            if k + 1 < n:
+                hijo = clave_nodo(base, nuevo_parcial, g)
+                if g < mejor_g.get(hijo, float('inf')):
+                    fn = f_intermedio(g, base, nuevo_parcial, indices)
+                    if horizonte is not None and fn > horizonte:
+                        continue
+                    mejor_g[hijo] = g
+                    open_list.push((prioridad(fn, g, k + 1), g, base, nuevo_parcial))
+            else:
+                # Último avión: se confirma el estado completo del paso siguiente
+                gn = g + 1
+                hijo = clave_nodo(nuevo_parcial, (), gn)
+                if gn < mejor_g.get(hijo, float('inf')):
+                    fn = gn + heuristica_grupo(nuevo_parcial, indices)
+                    if horizonte is not None and fn > horizonte:
+                        continue
+                    mejor_g[hijo] = gn
+                    parents[hijo] = clave_nodo(base, (), g)
+                    open_list.push((prioridad(fn, gn, 0), gn, nuevo_parcial, ()))
+
+    return None, None, nodos_expandidos
+
+def busqueda_descomposicion_operadores():
+    heuristica_inicial = heuristica(estado_inicial)
+    start_time = time.perf_counter()
+    plan, makespan, nodos_expandidos = busqueda_od(list(range(len(iniciales))))
+    end_time = time.perf_counter()
+    if plan is None:
+        return None, None, None, None, None # Sin solución
+    return plan, makespan, heuristica_inicial, nodos_expandidos, (end_time - start_time)
+
 # Busqueda A*
 def busqueda_a_estrella():
+    if modo_sucesores == "od":
+        return busqueda_descomposicion_operadores()
+
     start = estado_inicial
+    n = len(start)
     heuristica_inicial = heuristica(start)
+    codigo_inicial = codificar_estado(start)
+    codigo_objetivo = codificar_estado(goal_posiciones)
     
-    # Estructura de A*: cola de prioridad usando nuestra propia implementación
-    open_list = MinHeap()
-    open_list.push((heuristica_inicial, 0, start, None))
-    visited = set([start])
+    # Estructura de A*: cola de prioridad elegida con --abierta.
+    # Los estados se guardan codificados. mejor_g hace de visited: un estado
+    # solo se vuelve a insertar si se alcanza con menor g (con desempates que
+    # priorizan nodos profundos puede generarse antes por un camino peor).
+    open_list = crear_lista_abierta()
+    open_list.push((heuristica_inicial, 0, codigo_inicial, None))
+
+    parents = {codigo_inicial: None}
+    mejor_g = {codigo_inicial: 0}
 
-    parents = {start: None}
+    # --poda-sucesores: máscara de esperas por estado y máscara con la que se
+    # expandió
+    poda = args.poda_sucesores
+    esperas = {codigo_inicial: 0}
+    expandido_con = {}
+    podados = 0
+    reexpansiones = 0
 
     nodos_expandidos = 0
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     while len(open_list) > 0:
-        f, g, current, _ = open_list.pop()
+        f, g, codigo, _ = open_list.pop()
+        if g > mejor_g[codigo]:
+            # Entrada obsoleta: el estado ya se alcanzó con menor coste
+            continue
+        if poda:
+            esperaron = esperas[codigo]
+            if codigo in expandido_con:
+                if expandido_con[codigo] == esperaron:
+                    continue
+                reexpansiones += 1
+            expandido_con[codigo] = esperaron
         nodos_expandidos += 1
 
-        if es_objetivo(current):
-            end_time = time.time()
+        if codigo == codigo_objetivo:
+            end_time = time.perf_counter()
+            estadisticas_extra["Inserciones en abierta"] = open_list.inserciones
+            estadisticas_extra["Extracciones de abierta"] = open_list.extracciones
+            if poda:
+                estadisticas_extra["Combinaciones podadas"] = podados
+                estadisticas_extra["Reexpansiones por poda"] = reexpansiones
+            contar_duplicados(open_list)
             # Reconstruir solución
-            plan = reconstruir_solucion(current, parents)
+            plan = reconstruir_solucion(codigo, parents, n)
             return plan, g, heuristica_inicial, nodos_expandidos, (end_time - start_time)
 
-        for succ in obtener_sucesores(current):
-            if succ not in visited:
-                visited.add(succ)
-                gn = g + 1
+        current = decodificar_estado(codigo, n)
+        if poda:
+            sucesores = obtener_sucesores(current, esperaron)
+            if esperaron:
+                podados += combinaciones(current) - combinaciones(current, esperaron)
+        else:
+            sucesores = obtener_sucesores(current)
+        for succ in sucesores:
+            codigo_succ = codificar_estado(succ)
+            gn = g + 1
+            if gn < mejor_g.get(codigo_succ, float('inf')):
+                mejor_g[codigo_succ] = gn
                 fn = gn + heuristica(succ)
-                parents[succ] = current
-                open_list.push((fn, gn, succ, None))
+                parents[codigo_succ] = codigo
+                open_list.push((fn, gn, codigo_succ, None))
+                if poda:
+                    esperas[codigo_succ] = mascara_esperas(current, succ)
+            elif poda and gn == mejor_g[codigo_succ]:
+                mascara = esperas[codigo_succ] & mascara_esperas(current, succ)
+                if mascara != esperas[codigo_succ]:
+                    esperas[codigo_succ] = mascara
+                    if codigo_succ in expandido_con:
+                        open_list.push((gn + heuristica(succ), gn, codigo_succ, None))
 
+    contar_duplicados(open_list)
     return None, None, None, None, None # Sin solución
 
-def reconstruir_solucion(goal_state, parents):
+def reconstruir_solucion(codigo_objetivo, parents, n):
     # Reconstruye la secuencia de estados desde el estado objetivo hasta el inicial.
+    # parents guarda estados codificados; solo se decodifica el camino final.
     path = []
-    cur = goal_state
+    cur = codigo_objetivo
     while cur is not None:
-        path.append(cur)
+        path.append(decodificar_estado(cur, n))
         cur = parents[cur]
     path.reverse()
 
@@ -301,7 +1168,6 @@ def reconstruir_solucion(goal_state, parents):
     
     # path: [initial_state, ..., goal_state]
     # Vamos a crear un plan por cada avión.
-    n = len(iniciales)
     aviones_trayectoria = [[] for _ in range(n)]
     for state in path:
         for i,(r,c) in enumerate(state):
@@ -309,33 +1175,758 @@ def reconstruir_solucion(goal_state, parents):
     return aviones_trayectoria
 
 #######################################################################
-# Ejecución de la búsqueda
+# Conflict-Based Search (--motor cbs)
 #######################################################################
 
-plan, makespan, h_inicial, nodos_expandidos, tiempo_total = busqueda_a_estrella()
+# En vez de buscar en el producto de las posiciones de todos los aviones, se
+# planifica cada avión por separado con un A* espacio-temporal y los
+# conflictos entre caminos se resuelven en un árbol de restricciones (CT).
+#
+# El objetivo es el makespan: en cada nodo del CT todos los caminos tienen
+# exactamente T pasos y terminan en su meta en el instante T, con T el menor
+# makespan (no menor que el del padre) para el que cada avión tiene camino con
+# sus restricciones. El CT se recorre una sola vez, primero en anchura por T:
+# un nodo no puede bajar el T de su padre, y mientras haya un plan óptimo que
+# cumpla las restricciones de algún nodo abierto, ese nodo tiene T menor o
+# igual que el óptimo. Así el primer nodo sin conflictos que se extrae tiene
+# el makespan óptimo, el mismo que devuelve busqueda_a_estrella.
+#
+# Ramas distintas llegan a menudo al mismo conjunto de restricciones (los
+# mismos conflictos resueltos en otro orden); esos nodos se descartan.
+#
+# Conflictos (mismas reglas que generan_conflicto):
+#   ('v', i, j, celda, t): i y j en la misma celda en el instante t
+#   ('e', i, j, a, b, t): i pasa de a a b y j de b a a entre t-1 y t
+# Restricciones de un avión:
+#   ('v', celda, t): no puede estar en celda en el instante t
+#   ('e', a, b, t): no puede moverse de a a b entre t-1 y t
+#
+# En un CT denso (pocos huecos para muchos aviones) demostrar que no hay plan
+# con un makespan obliga a recorrer muchos nodos. Como en MA-CBS, cuando dos
+# grupos de aviones chocan más de UMBRAL_FUSION veces se fusionan en un grupo
+# que se planifica de forma conjunta con busqueda_od y la búsqueda empieza de
+# nuevo; en el peor caso queda un único grupo, que es la búsqueda conjunta.
+
+UMBRAL_FUSION = 8
 
-if plan is None:
-    print("No se ha encontrado solución")
-    sys.exit(0)
+def buscar_conflicto(caminos):
+    n = len(caminos)
+    horizonte = len(caminos[0])
+    for t in range(horizonte):
+        ocupadas = {}
+        for i in range(n):
+            celda = caminos[i][t]
+            if celda in ocupadas:
+                return ('v', ocupadas[celda], i, celda, t)
+            ocupadas[celda] = i
+        if t == 0:
+            continue
+        for i in range(n):
+            a, b = caminos[i][t - 1], caminos[i][t]
+            if a == b:
+                continue
+            j = ocupadas.get(a)
+            if j is not None and j != i and caminos[j][t - 1] == b:
+                return ('e', i, j, a, b, t)
+    return None
 
-# plan es una lista de listas: plan[i] = [(r,c), (r,c), ...] para el avión i
+def contar_conflictos(caminos):
+    n = len(caminos)
+    conflictos = 0
+    for t in range(len(caminos[0])):
+        for i in range(n):
+            for j in range(i + 1, n):
+                if caminos[i][t] == caminos[j][t]:
+                    conflictos += 1
+                elif t > 0 and caminos[i][t - 1] == caminos[j][t] and caminos[j][t - 1] == caminos[i][t]:
+                    conflictos += 1
+    return conflictos
+
+def tabla_ocupacion(caminos, excluido):
+    # Celdas y arcos usados por los demás aviones, para preferir caminos que
+    # no choquen con ellos (tabla de evitación de conflictos).
+    celdas = {}
+    arcos = {}
+    for j, camino in enumerate(caminos):
+        if j == excluido or camino is None:
+            continue
+        for t, celda in enumerate(camino):
+            celdas[(celda, t)] = celdas.get((celda, t), 0) + 1
+            if t > 0 and camino[t - 1] != celda:
+                clave = (camino[t - 1], celda, t)
+                arcos[clave] = arcos.get(clave, 0) + 1
+    return celdas, arcos
+
+def a_estrella_espacio_tiempo(i, restricciones, T, ocupacion):
+    # Camino de exactamente T pasos del avión i desde su inicio hasta su meta
+    # que respeta restricciones. Entre todos ellos (todos cuestan T) se busca
+    # el que menos choca con la tabla de ocupación. Devuelve (camino, nodos).
+    prohibidas = set()
+    arcos_prohibidos = set()
+    for r in restricciones:
+        if r[0] == 'v':
+            prohibidas.add((r[1], r[2]))
+        else:
+            arcos_prohibidos.add((r[1], r[2], r[3]))
+    celdas_ocupadas, arcos_ocupados = ocupacion
+    dist = distancias_min[i]
+    meta = finales[i]
+    inicio = iniciales[i]
+
+    if (inicio, 0) in prohibidas or dist[inicio[0] * cols + inicio[1]] > T:
+        return None, 0
+
+    # Prioridad (conflictos, -t): a igualdad de conflictos se profundiza primero
+    open_list = MinHeap()
+    open_list.push(((0, 0), 0, inicio, None))
+    mejor = {(inicio, 0): 0}
+    parents = {(inicio, 0): None}
+    nodos = 0
+    while len(open_list) > 0:
+        (conflictos, menos_t), _, pos, _ = open_list.pop()
+        t = -menos_t
+        if conflictos > mejor[(pos, t)]:
+            continue
+        nodos += 1
+        if t == T:
+            # Por la poda, en t == T solo puede estar en la meta
+            camino = []
+            nodo = (pos, t)
+            while nodo is not None:
+                camino.append(nodo[0])
+                nodo = parents[nodo]
+            camino.reverse()
+            return camino, nodos
+        for siguiente in acciones_avion(pos):
+            tn = t + 1
+            # Poda: desde siguiente no se llega a la meta antes de T
+            if tn + dist[siguiente[0] * cols + siguiente[1]] > T:
+                continue
+            if (siguiente, tn) in prohibidas or (pos, siguiente, tn) in arcos_prohibidos:
+                continue
+            cn = conflictos + celdas_ocupadas.get((siguiente, tn), 0)
+            if siguiente != pos:
+                cn += arcos_ocupados.get((siguiente, pos, tn), 0)
+            if cn < mejor.get((siguiente, tn), float('inf')):
+                mejor[(siguiente, tn)] = cn
+                parents[(siguiente, tn)] = (pos, t)
+                open_list.push(((cn, -tn), tn, siguiente, None))
+    return None, nodos
+
+def conflictos_de(caminos):
+    # Todos los conflictos entre caminos, con el formato de buscar_conflicto
+    n = len(caminos)
+    conflictos = []
+    for t in range(len(caminos[0])):
+        for i in range(n):
+            for j in range(i + 1, n):
+                if caminos[i][t] == caminos[j][t]:
+                    conflictos.append(('v', i, j, caminos[i][t], t))
+                elif t > 0 and caminos[i][t - 1] == caminos[j][t] and caminos[j][t - 1] == caminos[i][t]:
+                    conflictos.append(('e', i, j, caminos[i][t - 1], caminos[i][t], t))
+    return conflictos
+
+def primer_makespan(i, restricciones, desde):
+    # Menor T >= desde (hasta cota_makespan()) con el que el avión i tiene un
+    # camino de exactamente T pasos a su meta que respeta restricciones, o
+    # None. Recorre hacia delante las celdas alcanzables en cada instante
+    # como una máscara de bits (un paso son unos desplazamientos de la
+    # máscara); pasada la última restricción la sucesión de máscaras se
+    # repite, y si el ciclo no pasa por la meta no hay camino.
+    row, col = iniciales[i]
+    inicio = row * cols + col
+    distancia = distancias_min[i][inicio]
+    if not restricciones and desde <= distancia:
+        return distancia
+    prohibidas = {}
+    arcos_prohibidos = {}
+    ultima = 0
+    for r in restricciones:
+        if r[0] == 'v':
+            celda, t = r[1][0] * cols + r[1][1], r[2]
+            prohibidas[t] = prohibidas.get(t, 0) | 1 << celda
+        else:
+            t = r[3]
+            arcos_prohibidos.setdefault(t, []).append((r[1][0] * cols + r[1][1], r[2][0] * cols + r[2][1]))
+        ultima = max(ultima, t)
+    meta = 1 << (finales[i][0] * cols + finales[i][1])
+    alcanzables = (1 << inicio) & ~prohibidas.get(0, 0)
+    vistos = {}
+    t = 0
+    cota = cota_makespan()
+    while alcanzables and t <= cota:
+        if t >= desde and alcanzables & meta:
+            return t
+        if t > ultima:
+            if alcanzables in vistos:
+                if t >= desde and not any(m & meta for m, u in vistos.items() if u >= vistos[alcanzables]):
+                    return None
+            else:
+                vistos[alcanzables] = t
+        siguientes = (((alcanzables >> cols) | (alcanzables << cols) | ((alcanzables & mascara_no_primera) >> 1)
+                       | ((alcanzables & mascara_no_ultima) << 1)) & mascara_transitables) | (alcanzables & mascara_blancas)
+        t += 1
+        if t in arcos_prohibidos:
+            # b sigue siendo alcanzable si se llega desde otra celda
+            for a, b in arcos_prohibidos[t]:
+                if siguientes >> b & 1 and alcanzables >> a & 1:
+                    origenes = mascaras_acciones[b] & alcanzables
+                    for a2, b2 in arcos_prohibidos[t]:
+                        if b2 == b:
+                            origenes &= ~(1 << a2)
+                    if not origenes:
+                        siguientes &= ~(1 << b)
+        alcanzables = siguientes & ~prohibidas.get(t, 0)
+    return None
+
+def makespan_minimo(grupo, restricciones, desde):
+    # Menor T >= desde con el que cada avión del grupo tiene camino por
+    # separado (primer_makespan con las restricciones del grupo). Para un
+    # avión solo es exacto; para un grupo es una cota inferior.
+    T = desde
+    estable = False
+    while not estable:
+        estable = True
+        for i in grupo:
+            T_i = primer_makespan(i, restricciones, T)
+            if T_i is None:
+                return None
+            if T_i != T:
+                T = T_i
+                estable = False
+    return T
+
+def plan_grupo(grupo, restricciones, T, caminos):
+    # Plan de exactamente T pasos del grupo que respeta sus restricciones:
+    # A* espacio-temporal si es un solo avión (evitando los caminos de los
+    # demás) y busqueda_od sobre el grupo si no. Devuelve (plan, nodos).
+    if len(grupo) == 1:
+        camino, nodos = a_estrella_espacio_tiempo(grupo[0], restricciones, T, tabla_ocupacion(caminos, grupo[0]))
+        return (None if camino is None else [camino]), nodos
+    nodos = 0
+    if not restricciones:
+        # Sin restricciones: el plan óptimo del grupo, llevado a T
+        clave = tuple(grupo)
+        if clave not in planes_sin_restricciones:
+            planes_sin_restricciones[clave], _, nodos = busqueda_od(grupo)
+        plan = planes_sin_restricciones[clave]
+        if plan is None or len(plan[0]) - 1 > T:
+            return None, nodos
+        plan, nodos_ajuste = ajustar_a_makespan(grupo, plan, T)
+        return plan, nodos + nodos_ajuste
+    # Las restricciones del grupo valen para todos sus aviones; en las
+    # reservas de busqueda_od un arco (b, a, t) prohíbe moverse de a a b
+    celdas = set()
+    arcos = set()
+    for r in restricciones:
+        if r[0] == 'v':
+            celdas.add((r[1], r[2]))
+        else:
+            arcos.add((r[2], r[1], r[3]))
+    plan, _, nodos = busqueda_od(grupo, horizonte=T, reservas=(celdas, arcos))
+    return plan, nodos
+
+def planificar_nodo(grupos, restricciones, caminos, T, replanificar):
+    # Caminos de un nodo del CT con el menor makespan >= T con el que todos
+    # los grupos tienen plan: se replanifican los grupos de replanificar o,
+    # si hay que subir el makespan, todos. Devuelve (caminos, T, nodos de
+    # bajo nivel); caminos es None si no hay makespan hasta cota_makespan().
+    caminos = list(caminos)
+    nodos_bajo_nivel = 0
+    pendientes = replanificar
+    while T <= cota_makespan():
+        for g in pendientes:
+            T_g = makespan_minimo(grupos[g], restricciones[g], T)
+            if T_g is None:
+                return None, None, nodos_bajo_nivel
+            if T_g == T:
+                plan, nodos = plan_grupo(grupos[g], restricciones[g], T, caminos)
+                nodos_bajo_nivel += nodos
+                if plan is not None:
+                    for i, camino in zip(grupos[g], plan):
+                        caminos[i] = camino
+                    continue
+                T_g = T + 1
+            T = T_g
+            pendientes = range(len(grupos))
+            break
+        else:
+            return caminos, T, nodos_bajo_nivel
+    return None, None, nodos_bajo_nivel
+
+def ramas_conflicto(conflicto, grupo_de):
+    # (grupo, restricción) de los dos hijos de un conflicto
+    if conflicto[0] == 'v':
+        _, i, j, celda, t = conflicto
+        return [(grupo_de[i], ('v', celda, t)), (grupo_de[j], ('v', celda, t))]
+    _, i, j, a, b, t = conflicto
+    return [(grupo_de[i], ('e', a, b, t)), (grupo_de[j], ('e', b, a, t))]
+
+def elegir_conflicto(conflictos, grupos, grupo_de, restricciones, T):
+    # Conflicto cardinal (los dos hijos suben el makespan) si lo hay; si no,
+    # semicardinal (sube uno) y si no, el primero. Con los cardinales el CT
+    # sube de makespan en lugar de probar todas las formas de repartir los
+    # conflictos con el mismo T. En los grupos de varios aviones
+    # makespan_minimo es solo una cota, así que ahí es una estimación.
+    mejor, mejor_sube = conflictos[0], -1
+    for conflicto in conflictos:
+        sube = sum(1 for g, restriccion in ramas_conflicto(conflicto, grupo_de)
+                   if makespan_minimo(grupos[g], restricciones[g] + (restriccion,), T) != T)
+        if sube > mejor_sube:
+            mejor, mejor_sube = conflicto, sube
+            if sube == 2:
+                break
+    return mejor
+
+def cbs_grupos(grupos, cota, contadores):
+    # Búsqueda en el CT con los grupos dados, desde el makespan cota.
+    # Devuelve (caminos, T, None), (None, None, None) si no hay plan, o
+    # (None, None, par) con el par de grupos (índices) que hay que fusionar
+    # si han chocado más de UMBRAL_FUSION veces.
+    n = len(iniciales)
+    grupo_de = [None] * n
+    for g, grupo in enumerate(grupos):
+        for i in grupo:
+            grupo_de[i] = g
+
+    restricciones = tuple(() for _ in grupos)
+    caminos, T, nodos = planificar_nodo(grupos, restricciones, [None] * n, cota, range(len(grupos)))
+    contadores["bajo nivel"] += nodos
+    if caminos is None:
+        return None, None, None
+
+    # Se expanden primero los nodos de menor T y, a igualdad, los que tienen
+    # menos conflictos y después los más recientes. Si un hijo mantiene T y
+    # tiene menos conflictos que su padre, su plan sustituye al del padre
+    # (bypass) en lugar de ramificar: cumple también las restricciones del
+    # padre.
+    open_list = MinHeap()
+    contador = 0
+    conflictos = conflictos_de(caminos)
+    open_list.push(((T, len(conflictos), contador), restricciones, (caminos, T, conflictos), None))
+    vistos = {frozenset()}
+    choques = {}
+    while len(open_list) > 0:
+        _, restricciones, (caminos, T, conflictos), _ = open_list.pop()
+        contadores["ct"] += 1
+        hijos = []
+        while conflictos:
+            conflicto = elegir_conflicto(conflictos, grupos, grupo_de, restricciones, T)
+            par = tuple(sorted((grupo_de[conflicto[1]], grupo_de[conflicto[2]])))
+            choques[par] = choques.get(par, 0) + 1
+            if choques[par] > UMBRAL_FUSION:
+                return None, None, par
+            hijos = []
+            for g, restriccion in ramas_conflicto(conflicto, grupo_de):
+                nuevas = list(restricciones)
+                nuevas[g] = restricciones[g] + (restriccion,)
+                nuevos_caminos, nuevo_T, nodos = planificar_nodo(grupos, nuevas, caminos, T, [g])
+                contadores["bajo nivel"] += nodos
+                if nuevos_caminos is None:
+                    continue
+                nuevos_conflictos = conflictos_de(nuevos_caminos)
+                if nuevo_T == T and len(nuevos_conflictos) < len(conflictos):
+                    caminos, conflictos = nuevos_caminos, nuevos_conflictos
+                    break
+                hijos.append((tuple(nuevas), nuevos_caminos, nuevo_T, nuevos_conflictos))
+            else:
+                break
+
+        if not conflictos:
+            return caminos, T, None
+
+        for nuevas, nuevos_caminos, nuevo_T, nuevos_conflictos in hijos:
+            clave = frozenset((g, r) for g, lista in enumerate(nuevas) for r in lista)
+            if clave in vistos:
+                contadores["repetidos"] += 1
+                continue
+            vistos.add(clave)
+            contador -= 1
+            open_list.push(((nuevo_T, len(nuevos_conflictos), contador), nuevas,
+                            (nuevos_caminos, nuevo_T, nuevos_conflictos), None))
+    return None, None, None
+
+def cota_makespan():
+    if args.max_makespan is not None:
+        return args.max_makespan
+    return rows * cols * len(iniciales)
+
+def busqueda_cbs():
+    global mascaras_acciones, mascara_transitables, mascara_blancas, mascara_no_primera, mascara_no_ultima
+    global planes_sin_restricciones
+    start = estado_inicial
+    heuristica_inicial = heuristica(start)
+    start_time = time.perf_counter()
+
+    # Cota inferior: la mayor distancia mínima individual
+    n = len(iniciales)
+    cota = 0
+    for i, (row, col) in enumerate(iniciales):
+        d = distancias_min[i][row * cols + col]
+        if d == SIN_CAMINO:
+            return None, None, None, None, None # Sin solución
+        cota = max(cota, d)
+
+    # Máscaras de celdas para primer_makespan: destinos de cada celda
+    # (también son sus orígenes), transitables, blancas y las que no están en
+    # la primera o la última columna
+    mascaras_acciones = [sum(1 << (row * cols + col) for row, col in set(acciones_celda[celda]))
+                         for celda in range(num_celdas)]
+    mascara_transitables = sum(1 << celda for celda in range(num_celdas) if tipo_celda[celda] != GRIS)
+    mascara_blancas = sum(1 << celda for celda in range(num_celdas) if tipo_celda[celda] == BLANCA)
+    mascara_no_primera = sum(1 << celda for celda in range(num_celdas) if celda % cols != 0)
+    mascara_no_ultima = sum(1 << celda for celda in range(num_celdas) if celda % cols != cols - 1)
+    planes_sin_restricciones = {}
+
+    # Fusión y reinicio: si dos grupos chocan demasiadas veces se fusionan y
+    # el CT empieza de nuevo con un grupo menos
+    grupos = [[i] for i in range(n)]
+    contadores = {"ct": 0, "bajo nivel": 0, "repetidos": 0}
+    caminos, T, par = cbs_grupos(grupos, cota, contadores)
+    while par is not None:
+        g1, g2 = par
+        grupos[g1] = sorted(grupos[g1] + grupos[g2])
+        del grupos[g2]
+        caminos, T, par = cbs_grupos(grupos, cota, contadores)
+
+    estadisticas_extra["Nodos expandidos (bajo nivel)"] = contadores["bajo nivel"]
+    estadisticas_extra["Nodos CT repetidos"] = contadores["repetidos"]
+    estadisticas_extra["Tamaño de los grupos"] = ", ".join(
+        str(t) for t in sorted((len(grupo) for grupo in grupos), reverse=True))
+    if caminos is None:
+        return None, None, None, None, None # Sin solución
+    end_time = time.perf_counter()
+    return caminos, T, heuristica_inicial, contadores["ct"], (end_time - start_time)
 
 #######################################################################
-# Formato de salida
+# Detección de independencia (--independencia)
 #######################################################################
-# Generar fichero de salida
-import os
 
-# Obtener el directorio del archivo de entrada
-input_dir = os.path.dirname(map_path)
-map_name = os.path.basename(map_path).split('.')[0]
+# Se empieza con un grupo por avión, cuyo camino óptimo se obtiene bajando por
+# su tabla distancias_min. Mientras los planes de dos grupos choquen, se
+# fusionan y el grupo resultante se replanifica de forma conjunta con
+# busqueda_od. El coste depende así del mayor grupo de aviones que realmente
+# interactúan y no del número total de aviones.
+#
+# Antes de fusionar dos grupos en conflicto se intenta replanificar uno de
+# ellos con el mismo makespan evitando las celdas y arcos que usa el otro
+# (solo la primera vez que chocan esos dos grupos, para no entrar en ciclos,
+# y con un límite de nodos: es solo un atajo para no fusionar).
+#
+# Para comparar planes, todos se llevan al makespan común T (el mayor de los
+# grupos). Un grupo que llega antes repite el primer estado de su plan en el
+# que todos sus aviones están en celdas B (esperar todos a la vez no genera
+# conflictos); si no hay ninguno se replanifica para llegar justo en T.
+# Si algún grupo no tiene plan de exactamente T pasos, se prueba con T+1.
+# Cada grupo es óptimo por separado, luego el T final es el makespan óptimo.
+
+LIMITE_NODOS_EVITAR = 20000
+
+def camino_individual(i):
+    dist = distancias_min[i]
+    pos = iniciales[i]
+    if dist[pos[0] * cols + pos[1]] == SIN_CAMINO:
+        return None
+    camino = [pos]
+    while pos != finales[i]:
+        for vecino in vecinos(*pos):
+            if dist[vecino[0] * cols + vecino[1]] == dist[pos[0] * cols + pos[1]] - 1:
+                pos = vecino
+                break
+        camino.append(pos)
+    return camino
+
+def ajustar_a_makespan(grupo, plan, T):
+    # Devuelve (plan del grupo con exactamente T pasos o None, nodos expandidos)
+    pasos = len(plan[0]) - 1
+    if pasos == T:
+        return plan, 0
+    if pasos < T:
+        for t in range(pasos + 1):
+            if all(puede_esperar(mapa[row][col]) for row, col in (trayectoria[t] for trayectoria in plan)):
+                extra = T - pasos
+                return [trayectoria[:t] + [trayectoria[t]] * extra + trayectoria[t:] for trayectoria in plan], 0
+    plan, _, nodos = busqueda_od(grupo, horizonte=T)
+    return plan, nodos
+
+def reservas_de(plan):
+    celdas = set()
+    arcos = set()
+    for trayectoria in plan:
+        for t, celda in enumerate(trayectoria):
+            celdas.add((celda, t))
+            if t > 0 and trayectoria[t - 1] != celda:
+                arcos.add((trayectoria[t - 1], celda, t))
+    return celdas, arcos
+
+def busqueda_independencia():
+    n = len(iniciales)
+    heuristica_inicial = heuristica(estado_inicial)
+    start_time = time.perf_counter()
+
+    grupos = []
+    planes = []
+    nodos_expandidos = 0
+    for i in range(n):
+        camino = camino_individual(i)
+        if camino is None:
+            return None, None, None, None, None # Sin solución
+        nodos_expandidos += len(camino)
+        grupos.append([i])
+        planes.append([camino])
+    ya_evitados = set()
+
+    while True:
+        # Llevar todos los planes al makespan común
+        T = max(len(plan[0]) - 1 for plan in planes)
+        while True:
+            if T > cota_makespan():
+                return None, None, None, None, None # Sin solución
+            ajustados = []
+            for grupo, plan in zip(grupos, planes):
+                ajustado, nodos = ajustar_a_makespan(grupo, plan, T)
+                nodos_expandidos += nodos
+                if ajustado is None:
+                    break
+                ajustados.append(ajustado)
+            if len(ajustados) == len(grupos):
+                break
+            T += 1
+
+        caminos = [None] * n
+        grupo_de = [None] * n
+        for g, (grupo, plan) in enumerate(zip(grupos, ajustados)):
+            for i, trayectoria in zip(grupo, plan):
+                caminos[i] = trayectoria
+                grupo_de[i] = g
+
+        conflicto = buscar_conflicto(caminos)
+        if conflicto is None:
+            end_time = time.perf_counter()
+            tamanos = sorted((len(grupo) for grupo in grupos), reverse=True)
+            estadisticas_extra["Tamaño de los grupos"] = ", ".join(str(t) for t in tamanos)
+            return caminos, T, heuristica_inicial, nodos_expandidos, (end_time - start_time)
 
-# Crear las rutas de los archivos de salida en el mismo directorio del archivo de entrada
-output_file = os.path.join(input_dir, f"{map_name}-{num_heuristica}.output")
-stat_file = os.path.join(input_dir, f"{map_name}-{num_heuristica}.stat")
+        g1, g2 = sorted((grupo_de[conflicto[1]], grupo_de[conflicto[2]]))
+        par = (tuple(grupos[g1]), tuple(grupos[g2]))
+        if par not in ya_evitados:
+            ya_evitados.add(par)
+            evitado = False
+            for g, otro in ((g1, g2), (g2, g1)):
+                plan, _, nodos = busqueda_od(grupos[g], horizonte=T, reservas=reservas_de(ajustados[otro]),
+                                             limite_nodos=LIMITE_NODOS_EVITAR)
+                nodos_expandidos += nodos
+                if plan is not None:
+                    planes = ajustados
+                    planes[g] = plan
+                    evitado = True
+                    break
+            if evitado:
+                continue
 
-# Escribimos la solución
-with open(output_file, 'w') as f_out:
+        # Fusionar los dos grupos en conflicto y replanificarlos juntos
+        fusionado = sorted(grupos[g1] + grupos[g2])
+        plan, _, nodos = busqueda_od(fusionado)
+        nodos_expandidos += nodos
+        if plan is None:
+            return None, None, None, None, None # Sin solución
+        del grupos[g2], planes[g2]
+        grupos[g1] = fusionado
+        planes[g1] = plan
+
+#######################################################################
+# Planificación por prioridades (--motor prioridades)
+#######################################################################
+
+# Modo rápido para flotas grandes, sin garantía de makespan óptimo. Los
+# aviones se planifican uno a uno, en orden de prioridad, con un A*
+# espacio-temporal sobre índices de celda guiado por distancias_min, y cada
+# camino se añade a una tabla de reservas que respetan los siguientes:
+#   ocupadas: (celda, t) ocupadas por algún avión ya planificado
+#   arcos: (a, b, t), un avión pasa de a a b entre t-1 y t (prohíbe b -> a)
+#   aparcado[celda] = t: un avión llega a su meta en t y se queda en ella
+#   ultima[celda]: último instante en que la celda está reservada
+# Solo se puede esperar en celdas blancas (acciones de la tabla compilada) y
+# un avión termina en su meta cuando nadie la reserva después, porque se
+# queda esperando allí hasta el makespan. Si la meta es amarilla tiene que
+# llegar justo en el makespan; si no, el orden no sirve.
+#
+# El primer orden pone primero los aviones con el camino mínimo más largo;
+# con --reinicios se prueban además órdenes aleatorios y se queda el plan de
+# menor makespan (y menor suma de llegadas a igualdad). Un avión que no
+# encuentra camino en NODOS_POR_CELDA_PRIORIDADES * num_celdas expansiones
+# hace fallar su orden, para no agotar el espacio-tiempo en órdenes malos.
+# Cuando un orden falla se vuelve a probar con el avión que ha fallado en
+# primer lugar (normalmente le cerraba el paso un avión ya aparcado en su
+# meta), hasta tantas veces como aviones haya.
+#
+# El método no es completo: que ningún orden dé plan no demuestra que no lo
+# haya. En ese caso el .stat lo indica con los órdenes probados.
+NODOS_POR_CELDA_PRIORIDADES = 20
+
+def camino_con_reservas(i, ocupadas, arcos, aparcado, ultima, horizonte):
+    dist = distancias_min[i]
+    inicio = iniciales[i][0] * cols + iniciales[i][1]
+    meta = finales[i][0] * cols + finales[i][1]
+    if dist[inicio] == SIN_CAMINO:
+        return None, 0
+
+    # No se puede terminar antes de que la meta quede libre para siempre:
+    # f = max(t + dist, libre_desde + 1) sigue siendo admisible
+    libre_desde = ultima.get(meta, -1)
+    open_list = [(max(dist[inicio], libre_desde + 1), 0, inicio)]
+    parents = {(inicio, 0): None}
+    limite_nodos = NODOS_POR_CELDA_PRIORIDADES * num_celdas
+    nodos = 0
+    while open_list:
+        _, menos_t, celda = heapq.heappop(open_list)
+        t = -menos_t
+        nodos += 1
+        if celda == meta and t > libre_desde:
+            camino = []
+            nodo = (celda, t)
+            while nodo is not None:
+                camino.append(nodo[0])
+                nodo = parents[nodo]
+            camino.reverse()
+            return camino, nodos
+        if t >= horizonte:
+            continue
+        if nodos >= limite_nodos:
+            break
+        tn = t + 1
+        destinos = list(vecinos_celda[inicio_vecinos[celda]:inicio_vecinos[celda+1]])
+        if tipo_celda[celda] == BLANCA:
+            destinos.append(celda)
+        for siguiente in destinos:
+            if (siguiente, tn) in parents or (siguiente, tn) in ocupadas:
+                continue
+            desde = aparcado.get(siguiente)
+            if desde is not None and desde <= tn:
+                continue
+            if siguiente != celda and (siguiente, celda, tn) in arcos:
+                continue
+            d = dist[siguiente]
+            if d == SIN_CAMINO:
+                continue
+            parents[(siguiente, tn)] = (celda, t)
+            heapq.heappush(open_list, (max(tn + d, libre_desde + 1), -tn, siguiente))
+    return None, nodos
+
+def planificar_orden(k):
+    # Planifica con el orden k (0: más lejanos primero; k > 0: aleatorio),
+    # adelantando al avión que falla mientras no haya plan. Devuelve
+    # (makespan, suma de llegadas, nodos, caminos por avión, órdenes
+    # probados) con makespan None si ningún orden ha dado plan.
+    n = len(iniciales)
+    if k == 0:
+        orden = sorted(range(n), key=lambda i: -distancias_min[i][iniciales[i][0] * cols + iniciales[i][1]])
+    else:
+        orden = list(range(n))
+        random.Random(args.semilla + k).shuffle(orden)
+
+    nodos_total = 0
+    for intento in range(1, n + 1):
+        makespan, suma, nodos, caminos, fallido = planificar_con_orden(orden)
+        nodos_total += nodos
+        if makespan is not None:
+            return makespan, suma, nodos_total, caminos, intento
+        if orden[0] == fallido:
+            break # Ya era el primero: adelantarlo no cambia nada
+        orden.remove(fallido)
+        orden.insert(0, fallido)
+    return None, None, nodos_total, None, intento
+
+def planificar_con_orden(orden):
+    # Devuelve (makespan, suma de llegadas, nodos, caminos por avión, None)
+    # o, si algún avión no encuentra camino, (None, None, nodos, None, avión)
+    n = len(iniciales)
+    ocupadas = set()
+    arcos = set()
+    aparcado = {}
+    ultima = {}
+    caminos = [None] * n
+    nodos_total = 0
+    for i in orden:
+        # Cuando acaban las reservas el mapa no cambia: basta num_celdas pasos más
+        horizonte = max(ultima.values(), default=0) + num_celdas
+        camino, nodos = camino_con_reservas(i, ocupadas, arcos, aparcado, ultima, horizonte)
+        nodos_total += nodos
+        if camino is None:
+            return None, None, nodos_total, None, i
+        for t, celda in enumerate(camino):
+            ocupadas.add((celda, t))
+            if ultima.get(celda, -1) < t:
+                ultima[celda] = t
+            if t > 0 and camino[t - 1] != celda:
+                arcos.add((camino[t - 1], celda, t))
+        aparcado[camino[-1]] = len(camino) - 1
+        caminos[i] = camino
+
+    makespan = max(len(camino) - 1 for camino in caminos)
+    for i, camino in enumerate(caminos):
+        # Esperar en la meta hasta el makespan (solo en celdas blancas)
+        if len(camino) - 1 < makespan and tipo_celda[camino[-1]] != BLANCA:
+            return None, None, nodos_total, None, i
+    return makespan, sum(len(camino) - 1 for camino in caminos), nodos_total, caminos, None
+
+def busqueda_prioridades():
+    start = estado_inicial
+    heuristica_inicial = heuristica(start)
+    start_time = time.perf_counter()
+
+    ordenes = range(args.reinicios + 1)
+    if args.procesos > 1 and args.reinicios > 0 and "fork" in multiprocessing.get_all_start_methods():
+        with multiprocessing.get_context("fork").Pool(args.procesos) as pool:
+            resultados = pool.map(planificar_orden, ordenes)
+    else:
+        resultados = [planificar_orden(k) for k in ordenes]
+
+    nodos_expandidos = sum(nodos for _, _, nodos, _, _ in resultados)
+    validos = [(makespan, suma, k, caminos) for k, (makespan, suma, _, caminos, _) in enumerate(resultados)
+               if makespan is not None]
+    probados = sum(intentos for _, _, _, _, intentos in resultados)
+    estadisticas_extra["Óptimo"] = "no (planificación por prioridades)"
+    estadisticas_extra["Órdenes probados"] = probados
+    estadisticas_extra["Órdenes sin plan"] = probados - len(validos)
+    if not validos and args.respaldo:
+        # Búsqueda completa con cbs: su plan es óptimo y, si no lo hay, no hay solución
+        estadisticas_extra["Óptimo"] = "sí (respaldo cbs)"
+        plan, makespan, _, nodos_ct, _ = busqueda_cbs()
+        if plan is None:
+            return None, None, None, None, None # Sin solución
+        end_time = time.perf_counter()
+        return plan, makespan, heuristica_inicial, nodos_expandidos + nodos_ct, (end_time - start_time)
+    if not validos:
+        # Sin plan con estos órdenes, lo que no demuestra que no haya solución:
+        # se devuelven las estadísticas para que se escriba el .stat
+        estadisticas_extra["Resultado"] = "ningún orden da plan (no demuestra que no haya solución)"
+        end_time = time.perf_counter()
+        return None, None, heuristica_inicial, nodos_expandidos, (end_time - start_time)
+    makespan, suma, _, caminos = min(validos, key=lambda r: (r[0], r[1], r[2]))
+    estadisticas_extra["Suma de llegadas"] = suma
+
+    plan = []
+    for camino in caminos:
+        trayectoria = [posicion_celda[celda] for celda in camino]
+        trayectoria += [trayectoria[-1]] * (makespan + 1 - len(trayectoria))
+        plan.append(trayectoria)
+    end_time = time.perf_counter()
+    return plan, makespan, heuristica_inicial, nodos_expandidos, (end_time - start_time)
+
+#######################################################################
+# Formato de salida
+#######################################################################
+# plan es una lista de listas: plan[i] = [(r,c), (r,c), ...] para el avión i
+
+# Los ficheros de salida van en el mismo directorio que el mapa de entrada,
+# como <mapa>-<num-h>.output y <mapa>-<num-h>.stat (los fija preparar())
+output_file = None
+stat_file = None
+
+def formatear_plan(plan):
+    # Una línea por avión: posiciones separadas por la acción (w, ↑, ↓, ←, →)
+    lineas = []
     for avion_plan in plan:
         line = ""
         for idx, pos in enumerate(avion_plan):
@@ -354,12 +1945,1030 @@ with open(output_file, 'w') as f_out:
                 elif dy == 1:
                     line += " →"
             line += f" ({pos[0]},{pos[1]})"
-        f_out.write(line.strip() + "\n")
+        lineas.append(line.strip())
+    return lineas
+
+def escribir_solucion(plan):
+    with open(output_file, 'w') as f_out:
+        for line in formatear_plan(plan):
+            f_out.write(line + "\n")
+
+# Makespan del .stat cuando una búsqueda incompleta termina sin plan
+SIN_PLAN = "sin plan"
+
+def resumen_estadisticas(tiempo_total, makespan, h_inicial, nodos_expandidos):
+    # Estadísticas de la búsqueda en el orden en que se escriben en el .stat
+    estadisticas = {
+        "Tiempo total": float(tiempo_total),
+        "Makespan": makespan,
+        "h inicial": h_inicial,
+        "Nodos expandidos": nodos_expandidos,
+    }
+    estadisticas.update(estadisticas_extra)
+    return estadisticas
+
+def escribir_estadisticas(estadisticas):
+    with open(stat_file, 'w') as f_stat:
+        for clave, valor in estadisticas.items():
+            if clave == "Tiempo total":
+                f_stat.write(f"{clave}: {valor}s\n")
+            else:
+                f_stat.write(f"{clave}: {valor}\n")
+
+#######################################################################
+# Búsqueda anytime ARA* (--anytime)
+#######################################################################
+
+# A* ponderado con clave g + w*h que empieza con w = --peso-inicial para
+# encontrar pronto un primer plan y va bajando w hasta 1. Como en ARA*, cada
+# iteración reutiliza los g, parents y la lista abierta de la anterior:
+# durante una iteración cada estado se expande a lo sumo una vez (cerrados);
+# si un estado cerrado mejora su g se guarda en incons y pasa a la abierta en
+# la iteración siguiente.
+#
+# Tras cada iteración el plan es como mucho
+#   cota = g(objetivo) / min(g(s) + h(s), s en abierta o incons)
+# veces peor que el óptimo (y w es otra cota). Cada plan que mejora se
+# escribe en el .output y su cota en el .stat, de modo que si se agota
+# --tiempo-limite (o se mata el proceso) quedan escritos el mejor plan y su
+# cota. Con cota 1 el plan es óptimo.
+
+def busqueda_anytime():
+    start = estado_inicial
+    n = len(start)
+    heuristica_inicial = heuristica(start)
+    codigo_inicial = codificar_estado(start)
+    codigo_objetivo = codificar_estado(goal_posiciones)
+    start_time = time.perf_counter()
+    limite = None
+    if args.tiempo_limite is not None:
+        limite = time.monotonic() + args.tiempo_limite
+
+    mejor_g = {codigo_inicial: 0}
+    parents = {codigo_inicial: None}
+    valores_h = {codigo_inicial: heuristica_inicial}
+    en_abierta = set([codigo_inicial])
+    incons = set()
+    nodos_expandidos = 0
+    mejor_plan = None
+    mejor_makespan = None
+    cota = float('inf')
+    w = max(1.0, args.peso_inicial)
+
+    def clave(codigo):
+        return mejor_g[codigo] + w * valores_h[codigo]
+
+    while True:
+        # La abierta se reconstruye con el nuevo peso (más los incons)
+        en_abierta |= incons
+        incons = set()
+        open_list = ColaHeapq(args.desempate)
+        for codigo in en_abierta:
+            open_list.push((clave(codigo), mejor_g[codigo], codigo, None))
+        cerrados = set()
+
+        # ImprovePath: expandir mientras la menor clave sea menor que g(objetivo)
+        sin_tiempo = False
+        agotada = True
+        while len(open_list) > 0:
+            elem = open_list.pop()
+            k, g, codigo, _ = elem
+            if codigo in cerrados or g != mejor_g[codigo]:
+                continue  # entrada obsoleta
+            if k == float('inf'):
+                # Desde aquí no se llega a las metas (heurística 2 o 3)
+                break
+            if k >= mejor_g.get(codigo_objetivo, float('inf')):
+                open_list.push(elem)
+                agotada = False
+                break
+            if limite is not None and nodos_expandidos % 256 == 0 and time.monotonic() > limite:
+                sin_tiempo = True
+                agotada = False
+                break
+            en_abierta.discard(codigo)
+            cerrados.add(codigo)
+            nodos_expandidos += 1
+
+            current = decodificar_estado(codigo, n)
+            for succ in obtener_sucesores(current):
+                codigo_succ = codificar_estado(succ)
+                gn = g + 1
+                if gn < mejor_g.get(codigo_succ, float('inf')):
+                    mejor_g[codigo_succ] = gn
+                    parents[codigo_succ] = codigo
+                    if codigo_succ not in valores_h:
+                        valores_h[codigo_succ] = heuristica(succ)
+                    if codigo_succ in cerrados:
+                        incons.add(codigo_succ)
+                    else:
+                        en_abierta.add(codigo_succ)
+                        open_list.push((clave(codigo_succ), gn, codigo_succ, None))
+
+        g_objetivo = mejor_g.get(codigo_objetivo)
+        if g_objetivo is not None and not sin_tiempo:
+            minimo = min((mejor_g[c] + valores_h[c] for c in en_abierta | incons), default=float('inf'))
+            cota = min(w, g_objetivo / minimo) if minimo > 0 else w
+            cota = max(1.0, cota)
+            if mejor_makespan is None or g_objetivo < mejor_makespan or cota < estadisticas_extra.get("Cota de suboptimalidad", float('inf')):
+                mejor_plan = reconstruir_solucion(codigo_objetivo, parents, n)
+                mejor_makespan = g_objetivo
+                estadisticas_extra["Peso"] = w
+                estadisticas_extra["Cota de suboptimalidad"] = cota
+                if output_file is not None:
+                    escribir_solucion(mejor_plan)
+                    escribir_estadisticas(resumen_estadisticas(time.perf_counter() - start_time, mejor_makespan,
+                                                               heuristica_inicial, nodos_expandidos))
+                if intervalo_progreso:
+                    print(f"[{time.perf_counter() - start_time:.1f}s] plan con makespan {mejor_makespan} (peso {w}, cota {cota})",
+                          file=sys.stderr, flush=True)
+
+        if limite is not None and time.monotonic() > limite:
+            sin_tiempo = True
+        if sin_tiempo or cota <= 1.0 or w <= 1.0:
+            break
+        if g_objetivo is None and agotada:
+            break  # sin solución: se ha recorrido todo el espacio alcanzable
+        w = max(1.0, w - args.paso_peso)
+
+    end_time = time.perf_counter()
+    if mejor_plan is None and sin_tiempo:
+        # --tiempo-limite agotado antes del primer plan: no demuestra que no
+        # haya solución, se devuelven las estadísticas para escribir el .stat
+        estadisticas_extra["Resultado"] = "tiempo agotado antes del primer plan"
+        return None, None, heuristica_inicial, nodos_expandidos, (end_time - start_time)
+    if mejor_plan is None:
+        return None, None, None, None, None
+    return mejor_plan, mejor_makespan, heuristica_inicial, nodos_expandidos, (end_time - start_time)
+
+#######################################################################
+# IDA* con tabla de transposición (--ida)
+#######################################################################
+
+# Búsqueda en profundidad acotada por f = g + h; si no se llega a la meta,
+# el umbral pasa a ser la menor f que lo superó. Con heurística admisible la
+# primera meta encontrada tiene el makespan óptimo, igual que el A*.
+#
+# La memoria no depende del tamaño del espacio de estados: solo se guardan
+# el camino actual, los hijos pendientes de cada nivel y una tabla de
+# transposición codigo -> menor g con la que se ha visitado en la iteración.
+# Un estado que se vuelve a alcanzar con g mayor o igual se poda (su
+# subárbol ya se recorrió con más margen). La tabla se vacía en cada
+# iteración y deja de crecer al llegar a --limite-tabla entradas; a partir
+# de ahí solo se evitan los ciclos del camino actual, con lo que se pueden
+# repetir subárboles pero la memoria queda acotada.
+
+def hijos_ida(estado, g):
+    # Sucesores ordenados por f para llegar antes a la meta en la última
+    # iteración
+    hijos = []
+    for succ in obtener_sucesores(estado):
+        hijos.append((g + 1 + heuristica(succ), codificar_estado(succ), succ))
+    hijos.sort(key=lambda hijo: hijo[0])
+    return iter(hijos)
+
+def busqueda_ida():
+    start = estado_inicial
+    n = len(start)
+    heuristica_inicial = heuristica(start)
+    codigo_inicial = codificar_estado(start)
+    codigo_objetivo = codificar_estado(goal_posiciones)
+    start_time = time.perf_counter()
+
+    limite_tabla = args.limite_tabla
+    nodos_expandidos = 0
+    iteraciones = 0
+    max_tabla = 0
+    umbral = heuristica_inicial
+
+    while umbral <= cota_makespan():
+        iteraciones += 1
+        siguiente_umbral = float('inf')
+        tabla = {codigo_inicial: 0}
+        camino = [codigo_inicial]
+        en_camino = set(camino)
+        pendientes = [hijos_ida(start, 0)]
+        nodos_expandidos += 1
+
+        while pendientes:
+            hijo = next(pendientes[-1], None)
+            if hijo is None:
+                pendientes.pop()
+                en_camino.discard(camino.pop())
+                continue
+            f, codigo, estado = hijo
+            g = len(camino)
+            if f > umbral:
+                if f < siguiente_umbral:
+                    siguiente_umbral = f
+                continue
+            if codigo in en_camino or tabla.get(codigo, float('inf')) <= g:
+                continue
+            if codigo in tabla or len(tabla) < limite_tabla:
+                tabla[codigo] = g
+            camino.append(codigo)
+
+            if codigo == codigo_objetivo:
+                end_time = time.perf_counter()
+                estadisticas_extra["Iteraciones IDA*"] = iteraciones
+                estadisticas_extra["Entradas en la tabla de transposición"] = max(max_tabla, len(tabla))
+                parents = {codigo_inicial: None}
+                for anterior, siguiente in zip(camino, camino[1:]):
+                    parents[siguiente] = anterior
+                plan = reconstruir_solucion(codigo, parents, n)
+                return plan, g, heuristica_inicial, nodos_expandidos, (end_time - start_time)
+
+            en_camino.add(codigo)
+            nodos_expandidos += 1
+            pendientes.append(hijos_ida(estado, g))
+
+        max_tabla = max(max_tabla, len(tabla))
+        umbral = siguiente_umbral
+
+    return None, None, None, None, None # Sin solución
+
+#######################################################################
+# A* paralelo distribuido por hash (--procesos N)
+#######################################################################
+
+# Cada estado conjunto tiene un proceso dueño, hash(codigo) % N, que es el
+# único que guarda su g y su padre y el único que lo expande. Cada proceso
+# tiene su propia lista abierta y su mejor_g; los sucesores de otros dueños
+# se acumulan y se envían en un solo lote por destino a través de una
+# multiprocessing.Queue por proceso.
+#
+# La búsqueda avanza por rondas:
+#   1. cada proceso expande hasta --lote nodos con f < incumbente (el menor
+#      makespan encontrado hasta el momento, compartido entre procesos);
+#   2. envía un lote (posiblemente vacío) a cada uno de los demás y recibe
+#      exactamente N-1 lotes, así que no quedan mensajes en vuelo;
+#   3. publica la menor f de su abierta y espera en una barrera.
+# Se termina cuando ninguna abierta tiene un nodo con f < incumbente: como
+# la heurística es admisible, el incumbente es entonces el makespan óptimo.
+# Después cada proceso atiende las peticiones de padres con las que el
+# proceso principal reconstruye el plan.
+#
+# Necesita el método de arranque "fork" (los procesos heredan el mapa, las
+# heurísticas y los campos de distancias ya calculados).
+
+def dueno_estado(codigo, procesos):
+    # Hash multiplicativo (Fibonacci) sobre hash(codigo), que para enteros no
+    # depende de PYTHONHASHSEED. Se usan los bits altos del producto: los
+    # bajos dependen solo de los bajos del código (las primeras casillas).
+    return ((hash(codigo) * 0x9E3779B97F4A7C15) >> 64) % procesos
+
+def proceso_hda(i, procesos, colas, resultados, barrera, incumbente, minimos):
+    n = len(estado_inicial)
+    codigo_inicial = codificar_estado(estado_inicial)
+    codigo_objetivo = codificar_estado(goal_posiciones)
+    infinito = float('inf')
+
+    open_list = []
+    mejor_g = {}
+    parents = {}
+    nodos_expandidos = 0
+    rondas = 0
+    recibidos = 0 # sucesores que llegan de otros procesos
+
+    def insertar(f, g, codigo, padre):
+        if g < mejor_g.get(codigo, infinito):
+            mejor_g[codigo] = g
+            parents[codigo] = padre
+            heapq.heappush(open_list, (f, -g, codigo))
+
+    if dueno_estado(codigo_inicial, procesos) == i:
+        h = heuristica(estado_inicial)
+        if h != infinito:
+            insertar(h, 0, codigo_inicial, None)
+
+    while True:
+        # 1. Expansión local
+        salida = [[] for _ in range(procesos)]
+        expandidos_ronda = 0
+        while open_list and expandidos_ronda < args.lote:
+            f, menos_g, codigo = open_list[0]
+            g = -menos_g
+            if f >= incumbente.value:
+                break
+            heapq.heappop(open_list)
+            if g > mejor_g[codigo]:
+                continue  # entrada obsoleta
+            nodos_expandidos += 1
+            expandidos_ronda += 1
+            if codigo == codigo_objetivo:
+                with incumbente.get_lock():
+                    if g < incumbente.value:
+                        incumbente.value = g
+                continue
+
+            current = decodificar_estado(codigo, n)
+            for succ in obtener_sucesores(current):
+                fn = g + 1 + heuristica(succ)
+                if fn == infinito:
+                    continue
+                codigo_succ = codificar_estado(succ)
+                destino = dueno_estado(codigo_succ, procesos)
+                if destino == i:
+                    insertar(fn, g + 1, codigo_succ, codigo)
+                else:
+                    salida[destino].append((fn, g + 1, codigo_succ, codigo))
+
+        # 2. Intercambio de lotes
+        for j in range(procesos):
+            if j != i:
+                colas[j].put(salida[j])
+        for _ in range(procesos - 1):
+            lote = colas[i].get()
+            recibidos += len(lote)
+            for entrada in lote:
+                insertar(*entrada)
+        rondas += 1
+
+        # 3. Menor f pendiente y decisión común tras la barrera
+        while open_list and -open_list[0][1] > mejor_g[open_list[0][2]]:
+            heapq.heappop(open_list)
+        minimos[i] = open_list[0][0] if open_list else infinito
+        barrera.wait()
+        terminado = all(minimos[j] >= incumbente.value for j in range(procesos))
+        barrera.wait()
+        if terminado:
+            break
+
+    resultados.put((i, nodos_expandidos, recibidos, rondas))
+
+    # Servicio de padres para reconstruir el plan
+    while True:
+        peticion = colas[i].get()
+        if peticion is None:
+            return
+        resultados.put(parents[peticion])
+
+def busqueda_paralela():
+    procesos = args.procesos
+    start = estado_inicial
+    n = len(start)
+    heuristica_inicial = heuristica(start)
+    codigo_objetivo = codificar_estado(goal_posiciones)
+    start_time = time.perf_counter()
+
+    contexto = multiprocessing.get_context("fork")
+    colas = [contexto.Queue() for _ in range(procesos)]
+    resultados = contexto.Queue()
+    barrera = contexto.Barrier(procesos)
+    incumbente = contexto.Value('d', float('inf'))
+    minimos = contexto.Array('d', procesos)
+    trabajadores = [
+        contexto.Process(target=proceso_hda,
+                         args=(i, procesos, colas, resultados, barrera, incumbente, minimos))
+        for i in range(procesos)
+    ]
+    for trabajador in trabajadores:
+        trabajador.start()
+
+    expansiones = [0] * procesos
+    recibidos = [0] * procesos
+    for _ in range(procesos):
+        i, nodos, recibidos[i], rondas = resultados.get()
+        expansiones[i] = nodos
+
+    plan = None
+    makespan = None
+    if incumbente.value != float('inf'):
+        makespan = int(incumbente.value)
+        # Reconstrucción preguntando a cada dueño por el padre
+        parents = {codigo_objetivo: None}
+        cur = codigo_objetivo
+        while cur is not None:
+            colas[dueno_estado(cur, procesos)].put(cur)
+            padre = resultados.get()
+            parents[cur] = padre
+            cur = padre
+        plan = reconstruir_solucion(codigo_objetivo, parents, n)
+
+    for cola in colas:
+        cola.put(None)
+    for trabajador in trabajadores:
+        trabajador.join()
+    end_time = time.perf_counter()
+
+    if plan is None:
+        return None, None, None, None, None # Sin solución
+
+    nodos_expandidos = sum(expansiones)
+    media = nodos_expandidos / procesos
+    estadisticas_extra["Procesos"] = procesos
+    estadisticas_extra["Expansiones por proceso"] = ", ".join(str(e) for e in expansiones)
+    # Balance de carga: máximo / media (1.0 = reparto perfecto)
+    estadisticas_extra["Balance de carga"] = round(max(expansiones) / media, 3) if media > 0 else 1.0
+    # Comunicación: rondas de intercambio (iguales en todos los procesos) y
+    # sucesores recibidos de los demás procesos
+    estadisticas_extra["Rondas de intercambio"] = rondas
+    estadisticas_extra["Sucesores recibidos por proceso"] = ", ".join(str(r) for r in recibidos)
+    return plan, makespan, heuristica_inicial, nodos_expandidos, (end_time - start_time)
+
+#######################################################################
+# Instrumentación (--metricas, --progreso)
+#######################################################################
+
+# Desactivada no cuesta nada: las funciones de la búsqueda no llevan ninguna
+# comprobación. activar_metricas() sustituye en el módulo obtener_sucesores,
+# generan_conflicto, heuristica, construir_pdb y las clases de lista abierta
+# por versiones que cuentan llamadas y miden su tiempo; como todas se buscan
+# por nombre al llamarlas, la búsqueda usa las medidas sin cambiar su código.
+#
+# metricas["fases"]: segundos por fase (lectura, compilacion, distancias,
+#     pdb, busqueda, escritura), sin solaparse entre sí
+# metricas["tiempos"], metricas["llamadas"]: por función medida (el tiempo
+#     de sucesores incluye el de conflictos)
+# metricas["contadores"]: sucesores generados, podados por conflicto,
+#     duplicados, inserciones, extracciones, tamaño máximo de la abierta
+
+metricas = None
+intervalo_progreso = None
+
+def activar_metricas(progreso=None):
+    global metricas, intervalo_progreso
+    global obtener_sucesores, generan_conflicto, heuristica, construir_pdb
+    global MinHeap, ColaCubos, ColaHeapq
+    metricas = {}
+    intervalo_progreso = progreso
+    reiniciar_metricas()
+    obtener_sucesores = medir_sucesores(obtener_sucesores)
+    generan_conflicto = medir_conflictos(generan_conflicto)
+    heuristica = medir_funcion("heuristica", heuristica)
+    construir_pdb = medir_fase_funcion("pdb", construir_pdb)
+    MinHeap = lista_medida(MinHeap)
+    ColaCubos = lista_medida(ColaCubos)
+    ColaHeapq = lista_medida(ColaHeapq)
+
+def reiniciar_metricas():
+    if metricas is None:
+        return
+    metricas["fases"] = {}
+    metricas["tiempos"] = {"sucesores": 0.0, "conflictos": 0.0, "heuristica": 0.0, "lista abierta": 0.0}
+    metricas["llamadas"] = {"sucesores": 0, "conflictos": 0, "heuristica": 0}
+    metricas["contadores"] = {
+        "sucesores_generados": 0,
+        "podados_por_conflicto": 0,
+        "inserciones": 0,
+        "extracciones": 0,
+        "max_abierta": 0,
+    }
+    metricas["inicio"] = time.perf_counter()
+    metricas["siguiente_progreso"] = metricas["inicio"] + (intervalo_progreso or 0)
+
+def registrar_fase(nombre, inicio, excluir=()):
+    # Suma a la fase el tiempo desde inicio, descontando el de las fases
+    # excluir que hayan ocurrido dentro
+    if metricas is None:
+        return
+    fases = metricas["fases"]
+    duracion = time.perf_counter() - inicio - sum(fases.get(otra, 0.0) for otra in excluir)
+    fases[nombre] = fases.get(nombre, 0.0) + duracion
+
+def medir_funcion(nombre, funcion):
+    def medida(*argumentos):
+        inicio = time.perf_counter()
+        resultado = funcion(*argumentos)
+        metricas["tiempos"][nombre] += time.perf_counter() - inicio
+        metricas["llamadas"][nombre] += 1
+        return resultado
+    return medida
+
+def medir_fase_funcion(nombre, funcion):
+    def medida(*argumentos):
+        inicio = time.perf_counter()
+        resultado = funcion(*argumentos)
+        registrar_fase(nombre, inicio)
+        return resultado
+    return medida
+
+def medir_sucesores(funcion):
+    def medida(estado, *resto):
+        inicio = time.perf_counter()
+        sucesores = list(funcion(estado, *resto))
+        metricas["tiempos"]["sucesores"] += time.perf_counter() - inicio
+        metricas["llamadas"]["sucesores"] += 1
+        metricas["contadores"]["sucesores_generados"] += len(sucesores)
+        return iter(sucesores)
+    return medida
+
+def medir_conflictos(funcion):
+    def medida(estado_anterior, estado_nuevo):
+        inicio = time.perf_counter()
+        conflicto = funcion(estado_anterior, estado_nuevo)
+        metricas["tiempos"]["conflictos"] += time.perf_counter() - inicio
+        metricas["llamadas"]["conflictos"] += 1
+        if conflicto:
+            metricas["contadores"]["podados_por_conflicto"] += 1
+        return conflicto
+    return medida
+
+def lista_medida(clase):
+    # Subclase de la lista abierta que mide push/pop, guarda el tamaño
+    # máximo y, con --progreso, escribe el avance cada intervalo_progreso s
+    class ListaMedida(clase):
+        def push(self, element):
+            inicio = time.perf_counter()
+            clase.push(self, element)
+            metricas["tiempos"]["lista abierta"] += time.perf_counter() - inicio
+            contadores = metricas["contadores"]
+            contadores["inserciones"] += 1
+            if len(self) > contadores["max_abierta"]:
+                contadores["max_abierta"] = len(self)
+
+        def pop(self):
+            inicio = time.perf_counter()
+            element = clase.pop(self)
+            ahora = time.perf_counter()
+            metricas["tiempos"]["lista abierta"] += ahora - inicio
+            metricas["contadores"]["extracciones"] += 1
+            if intervalo_progreso and ahora >= metricas["siguiente_progreso"]:
+                metricas["siguiente_progreso"] = ahora + intervalo_progreso
+                mostrar_progreso(ahora, len(self), element)
+            return element
+
+    ListaMedida.__name__ = clase.__name__
+    return ListaMedida
+
+def mostrar_progreso(ahora, tam_abierta, element):
+    contadores = metricas["contadores"]
+    print(f"[{ahora - metricas['inicio']:.1f}s] extracciones: {contadores['extracciones']}"
+          f" abierta: {tam_abierta} f: {element[0]} g: {element[1]}"
+          f" sucesores: {contadores['sucesores_generados']}", file=sys.stderr, flush=True)
+
+def contar_duplicados(open_list):
+    # Sucesores descartados por tener ya un g igual o mejor (A* conjunto):
+    # los generados que no se insertaron (la primera inserción es el inicial)
+    if metricas is None:
+        return
+    metricas["contadores"]["duplicados"] = \
+        metricas["contadores"]["sucesores_generados"] - (open_list.inserciones - 1)
+
+def memoria_maxima_kb():
+    if resource is None:
+        return None
+    maxima = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        maxima //= 1024  # macOS la da en bytes
+    return maxima
+
+def resumen_metricas(estadisticas):
+    contadores = dict(metricas["contadores"])
+    llamadas_sucesores = metricas["llamadas"]["sucesores"]
+    if llamadas_sucesores:
+        contadores["factor_ramificacion_medio"] = contadores["sucesores_generados"] / llamadas_sucesores
+    return {
+        "mapa": map_path,
+        "heuristica": num_heuristica,
+        "estadisticas": estadisticas,
+        "fases": metricas["fases"],
+        "tiempos": metricas["tiempos"],
+        "llamadas": metricas["llamadas"],
+        "contadores": contadores,
+        "memoria_maxima_kb": memoria_maxima_kb(),
+    }
+
+def escribir_metricas(estadisticas):
+    # <mapa>-<num-h>.json junto al .stat
+    ruta = os.path.splitext(stat_file)[0] + ".json"
+    with open(ruta, 'w') as f_json:
+        json.dump(resumen_metricas(estadisticas), f_json, indent=2, ensure_ascii=False)
+        f_json.write("\n")
+
+#######################################################################
+# API
+#######################################################################
+
+# Uso como módulo (import ASTARRodaje):
+#   datos = leer_mapa("mapa01.csv")
+#   plan, estadisticas = resolver(datos, 2, motor="cbs")
+# plan[i] es la lista de posiciones del avión i (None si no hay solución) y
+# estadisticas el diccionario con lo que se escribiría en el .stat. Las
+# opciones son las de la línea de órdenes con el nombre de su atributo.
+# resolver() no escribe ficheros, salvo los planes intermedios de --anytime
+# cuando el mapa tiene ruta.
+#
+# El estado de la búsqueda (mapa compilado, distancias, opciones) son
+# variables del módulo que fija preparar(), así que en un mismo proceso solo
+# puede haber una búsqueda a la vez.
+
+def preparar(datos, heuristica_num, args_busqueda, distancias=None):
+    # distancias: campos ya calculados, uno por avión (p. ej. los que mantiene
+    # Replanificador); si se dan no se llama a precalcular_distancias
+    global args, map_path, num_heuristica, modo_sucesores, motor, independencia
+    global iniciales, finales, mapa, rows, cols, estadisticas_extra
+    global distancias_min, huella_mapa, parejas_pdb, pdb_construidas
+    global estado_inicial, goal_posiciones, output_file, stat_file
+
+    reiniciar_metricas()
+    args = args_busqueda
+    map_path = datos.ruta
+    num_heuristica = heuristica_num
+    modo_sucesores = args.sucesores
+    motor = args.motor
+    independencia = args.independencia
+
+    iniciales = list(datos.iniciales)
+    finales = list(datos.finales)
+    estadisticas_extra = {}
+    if datos.mapa is not mapa:
+        # Rejilla nueva (con DatosMapa.con_aviones se reutiliza la compilada)
+        inicio = time.perf_counter()
+        mapa = datos.mapa
+        rows = len(mapa)
+        cols = len(mapa[0])
+        compilar_rejilla()
+        huella_mapa = hashlib.sha1(f"{rows}x{cols}\n".encode() +
+                                   "\n".join(";".join(fila) for fila in mapa).encode()).hexdigest()
+        registrar_fase("compilacion", inicio)
+    estado_inicial = tuple(iniciales)
+    goal_posiciones = tuple(finales)
+
+    distancias_min = []
+    parejas_pdb = []
+    pdb_construidas = False
+    if distancias is not None:
+        distancias_min = list(distancias)
+    # cbs usa las distancias reales para podar su A* espacio-temporal y la
+    # detección de independencia para los caminos individuales
+    elif num_heuristica in (2, 3) or motor in ("cbs", "prioridades") or independencia:
+        inicio = time.perf_counter()
+        precalcular_distancias()
+        registrar_fase("distancias", inicio)
+
+    if map_path is None:
+        output_file = None
+        stat_file = None
+    else:
+        input_dir = os.path.dirname(map_path)
+        map_name = os.path.basename(map_path).split('.')[0]
+        output_file = os.path.join(input_dir, f"{map_name}-{num_heuristica}.output")
+        stat_file = os.path.join(input_dir, f"{map_name}-{num_heuristica}.stat")
+
+def ejecutar_busqueda():
+    if motor == "cbs":
+        return busqueda_cbs()
+    if motor == "prioridades":
+        return busqueda_prioridades()
+    if independencia:
+        return busqueda_independencia()
+    if args.procesos > 1 and "fork" in multiprocessing.get_all_start_methods():
+        return busqueda_paralela()
+    if args.ida:
+        return busqueda_ida()
+    if args.anytime:
+        return busqueda_anytime()
+    return busqueda_a_estrella()
+
+def resolver(datos, heuristica_num, **opciones):
+    preparar(datos, heuristica_num, opciones_busqueda(**opciones))
+    inicio = time.perf_counter()
+    plan, makespan, h_inicial, nodos_expandidos, tiempo_total = ejecutar_busqueda()
+    registrar_fase("busqueda", inicio, excluir=("pdb",))
+    if plan is None:
+        if tiempo_total is None:
+            return None, dict(estadisticas_extra)
+        # Búsqueda incompleta sin plan (prioridades, anytime sin tiempo): sus
+        # estadísticas sin makespan
+        return None, resumen_estadisticas(tiempo_total, SIN_PLAN, h_inicial, nodos_expandidos)
+    return plan, resumen_estadisticas(tiempo_total, makespan, h_inicial, nodos_expandidos)
+
+#######################################################################
+# Replanificación incremental
+#######################################################################
+
+# Replanificador mantiene un plan en curso y lo repara cuando, en el instante
+# t, cambia el mapa (cambiar_mapa: celdas que pasan a G, A o B) o la flota
+# (anadir_aviones, retirar_aviones), en vez de volver a resolver desde cero:
+#
+# - Los campos de distancias se guardan como array('i') por celda meta y se
+#   actualizan localmente (actualizar_distancias): al cerrar celdas solo se
+#   recalculan las celdas que se quedan sin ningún vecino a distancia d-1
+#   (como en LPA*/D* Lite, las que dejan de ser consistentes) y al abrirlas
+#   se propagan solo las mejoras. El coste depende de las celdas cuya
+#   distancia cambia, no del tamaño del mapa. Un avión nuevo solo necesita
+#   el BFS de su meta si no hay ya un campo para ella.
+# - El plan se repara desde las posiciones en t. Si los cambios solo
+#   restringen (cierres, B -> A, aviones nuevos), se mantienen los caminos
+#   que siguen siendo válidos y se replanifican uno a uno los afectados con
+#   el A* espacio-temporal de la planificación por prioridades, sin pasar
+#   del makespan restante. Como restringir no puede bajar el makespan
+#   óptimo, si lo consiguen el plan sigue siendo óptimo ("Reparación:
+#   local"). Si no, o si se abren celdas o se retiran aviones (que pueden
+#   mejorarlo), se resuelve de nuevo desde t con las opciones originales
+#   pero sin recalcular distancias ("Reparación: completa").
+#
+# Los planes devueltos empiezan en el instante t del cambio.
+
+def actualizar_distancias(dist, meta, cerradas, abiertas):
+    # dist: array('i') de distancias a meta, con la rejilla compilada ya
+    # actualizada. Devuelve el número de celdas cuya distancia se revisa.
+    def vecinas(celda):
+        return vecinos_celda[inicio_vecinos[celda]:inicio_vecinos[celda+1]]
+
+    # Cierres: celdas que pierden todos sus apoyos (vecinos a distancia d-1),
+    # por niveles de distancia crecientes
+    afectadas = set()
+    revisar = []
+    en_cola = set()
+    for celda in cerradas:
+        d = dist[celda]
+        if d == SIN_CAMINO:
+            continue
+        dist[celda] = SIN_CAMINO
+        row, col = divmod(celda, cols)
+        for dr, dc in ((-1,0), (1,0), (0,-1), (0,1)):
+            vecino_row, vecino_col = row + dr, col + dc
+            if 0 <= vecino_row < rows and 0 <= vecino_col < cols:
+                vecino = vecino_row * cols + vecino_col
+                if tipo_celda[vecino] != GRIS and dist[vecino] == d + 1 and vecino not in en_cola:
+                    en_cola.add(vecino)
+                    heapq.heappush(revisar, (d + 1, vecino))
+    while revisar:
+        d, celda = heapq.heappop(revisar)
+        if any(dist[w] == d - 1 and w not in afectadas for w in vecinas(celda)):
+            continue
+        afectadas.add(celda)
+        for w in vecinas(celda):
+            if dist[w] == d + 1 and w not in en_cola:
+                en_cola.add(w)
+                heapq.heappush(revisar, (d + 1, w))
+
+    # Las afectadas se recalculan desde sus vecinos no afectados
+    frontera = []
+    for celda in afectadas:
+        dist[celda] = SIN_CAMINO
+    for celda in afectadas:
+        mejor = min((dist[w] for w in vecinas(celda) if w not in afectadas), default=SIN_CAMINO)
+        if mejor != SIN_CAMINO:
+            dist[celda] = mejor + 1
+            heapq.heappush(frontera, (mejor + 1, celda))
+
+    # Aperturas: la celda toma la distancia de su mejor vecino y las mejoras
+    # se propagan
+    for celda in abiertas:
+        if celda == meta:
+            dist[celda] = 0
+        else:
+            mejor = min((dist[w] for w in vecinas(celda)), default=SIN_CAMINO)
+            dist[celda] = mejor + 1 if mejor != SIN_CAMINO else SIN_CAMINO
+        if dist[celda] != SIN_CAMINO:
+            heapq.heappush(frontera, (dist[celda], celda))
+
+    revisadas = len(afectadas)
+    while frontera:
+        d, celda = heapq.heappop(frontera)
+        if d > dist[celda]:
+            continue
+        revisadas += 1
+        for w in vecinas(celda):
+            if d + 1 < dist[w]:
+                dist[w] = d + 1
+                heapq.heappush(frontera, (d + 1, w))
+    return revisadas
+
+class Replanificador:
+    def __init__(self, datos, num_heuristica, **opciones):
+        self.num_heuristica = num_heuristica
+        self.opciones = opciones
+        self.mapa = [list(fila) for fila in datos.mapa]
+        self.iniciales = list(datos.iniciales)
+        self.finales = list(datos.finales)
+        self.t = 0
+        # Campos de distancias por celda meta (array('i'), modificables)
+        self.campos = {}
+        self.plan, self.estadisticas = resolver(self.datos_actuales(), num_heuristica, **opciones)
+        if self.plan is None:
+            raise ValueError("El problema inicial no tiene solución")
+        self.makespan = self.estadisticas["Makespan"]
+        for (row, col), dist in zip(self.finales, distancias_min):
+            self.campos[row * cols + col] = array('i', dist)
+        self.preparar_campos()
+
+    def preparar_campos(self):
+        # Compila la rejilla actual (si ha cambiado) y añade el campo de las
+        # metas que no lo tienen (aviones nuevos, o si la búsqueda inicial no
+        # usó distancias)
+        preparar(self.datos_actuales(), self.num_heuristica, opciones_busqueda(**self.opciones),
+                 distancias=[])
+        for row, col in self.finales:
+            meta = row * cols + col
+            if meta not in self.campos:
+                self.campos[meta] = bfs_distancias(meta)
+
+    def datos_actuales(self):
+        datos = DatosMapa(self.iniciales, self.finales, [])
+        datos.mapa = self.mapa
+        return datos
+
+    def posiciones_en(self, t):
+        if t < self.t:
+            raise ValueError(f"El instante {t} es anterior al plan en curso ({self.t})")
+        k = t - self.t
+        return [trayectoria[min(k, len(trayectoria) - 1)] for trayectoria in self.plan]
+
+    def avanzar(self, t):
+        # Recorta el plan en curso para que empiece en t
+        posiciones = self.posiciones_en(t)
+        k = t - self.t
+        self.plan = [trayectoria[k:] if k < len(trayectoria) else [pos]
+                     for trayectoria, pos in zip(self.plan, posiciones)]
+        self.makespan = max(len(trayectoria) for trayectoria in self.plan) - 1
+        self.iniciales = posiciones
+        self.t = t
+
+    def cambiar_mapa(self, t, cambios):
+        # cambios: {(row, col): 'G' | 'A' | 'B'}. Si no hay solución devuelve
+        # (None, estadísticas) y el plan en curso deja de ser válido.
+        ocupadas = set(self.posiciones_en(t))
+        metas = set(self.finales)
+        cerradas = []
+        abiertas = []
+        restringe = True
+        nuevo_mapa = [list(fila) for fila in self.mapa]
+        for (row, col), tipo in cambios.items():
+            if not (0 <= row < rows and 0 <= col < cols) or tipo not in ('G', 'A', 'B'):
+                raise ValueError(f"Cambio no válido: ({row},{col}) -> {tipo}")
+            anterior = nuevo_mapa[row][col]
+            if tipo == anterior:
+                continue
+            if tipo == 'G' and ((row, col) in ocupadas or (row, col) in metas):
+                raise ValueError(f"No se puede cerrar ({row},{col}): hay un avión o una meta")
+            nuevo_mapa[row][col] = tipo
+            if tipo == 'G':
+                cerradas.append(row * cols + col)
+            elif anterior == 'G':
+                abiertas.append(row * cols + col)
+                restringe = False
+            elif tipo == 'B':
+                restringe = False  # A -> B: se puede esperar donde antes no
+        self.avanzar(t)
+        self.mapa = nuevo_mapa
+        self.preparar_campos()
+        inicio = time.perf_counter()
+        revisadas = 0
+        for meta, dist in self.campos.items():
+            revisadas += actualizar_distancias(dist, meta, cerradas, abiertas)
+        tiempo_distancias = time.perf_counter() - inicio
+        plan, estadisticas = self.reparar(restringe, nuevos=())
+        estadisticas["Celdas con distancia revisada"] = revisadas
+        estadisticas["Tiempo de actualización de distancias"] = tiempo_distancias
+        return plan, estadisticas
+
+    def anadir_aviones(self, t, aviones):
+        # aviones: [((row, col) inicial, (row, col) final), ...]; aparecen en t
+        ocupadas = set(self.posiciones_en(t))
+        metas = set(self.finales)
+        for inicial, final in aviones:
+            for row, col in (inicial, final):
+                if not (0 <= row < rows and 0 <= col < cols) or self.mapa[row][col] != 'B':
+                    raise ValueError(f"Posición no válida para un avión: ({row},{col})")
+            if tuple(inicial) in ocupadas or tuple(final) in metas:
+                raise ValueError(f"La posición {tuple(inicial)} o la meta {tuple(final)} ya está en uso")
+            ocupadas.add(tuple(inicial))
+            metas.add(tuple(final))
+        self.avanzar(t)
+        nuevos = []
+        for inicial, final in aviones:
+            nuevos.append(len(self.iniciales))
+            self.iniciales.append(tuple(inicial))
+            self.finales.append(tuple(final))
+            self.plan.append([tuple(inicial)])
+        self.preparar_campos()
+        return self.reparar(True, nuevos)
+
+    def retirar_aviones(self, t, indices):
+        self.avanzar(t)
+        retirados = set(indices)
+        quedan = [i for i in range(len(self.iniciales)) if i not in retirados]
+        self.iniciales = [self.iniciales[i] for i in quedan]
+        self.finales = [self.finales[i] for i in quedan]
+        self.plan = [self.plan[i] for i in quedan]
+        return self.reparar(False, nuevos=())
+
+    def distancias_actuales(self):
+        return [self.campos[row * cols + col] for row, col in self.finales]
+
+    def reparar(self, restringe, nuevos):
+        inicio = time.perf_counter()
+        preparar(self.datos_actuales(), self.num_heuristica, opciones_busqueda(**self.opciones),
+                 distancias=self.distancias_actuales())
+        plan = None
+        if restringe:
+            plan, nodos = self.reparacion_local(nuevos)
+            if plan is not None:
+                # h inicial: cota de distancias (no se construye la PDB de h3)
+                estadisticas = resumen_estadisticas(time.perf_counter() - inicio, self.makespan,
+                                                    heuristica_2(estado_inicial), nodos)
+                estadisticas["Reparación"] = "local"
+        if plan is None:
+            plan, makespan, h_inicial, nodos, _ = ejecutar_busqueda()
+            if plan is None:
+                return None, dict(estadisticas_extra, Reparación="completa")
+            self.makespan = makespan
+            estadisticas = resumen_estadisticas(time.perf_counter() - inicio, makespan, h_inicial, nodos)
+            estadisticas["Reparación"] = "completa"
+        self.plan = plan
+        return plan, estadisticas
+
+    def reparacion_local(self, nuevos):
+        # Conserva los caminos válidos y replanifica los demás contra sus
+        # reservas sin superar el makespan restante
+        T = self.makespan
+        invalidos = list(nuevos)
+        for i, trayectoria in enumerate(self.plan):
+            if i in nuevos:
+                continue
+            for k, (row, col) in enumerate(trayectoria):
+                tipo = tipo_celda[row * cols + col]
+                if tipo == GRIS or (k > 0 and trayectoria[k - 1] == (row, col) and tipo != BLANCA):
+                    invalidos.append(i)
+                    break
+        if not invalidos:
+            return [list(trayectoria) for trayectoria in self.plan], 0
+
+        ocupadas = set()
+        arcos = set()
+        aparcado = {}
+        ultima = {}
+        def reservar(camino):
+            for k, celda in enumerate(camino):
+                ocupadas.add((celda, k))
+                if ultima.get(celda, -1) < k:
+                    ultima[celda] = k
+                if k > 0 and camino[k - 1] != celda:
+                    arcos.add((camino[k - 1], celda, k))
+            llegada = len(camino) - 1
+            while llegada > 0 and camino[llegada - 1] == camino[-1]:
+                llegada -= 1
+            aparcado[camino[-1]] = llegada
+
+        caminos = {}
+        for i, trayectoria in enumerate(self.plan):
+            if i not in invalidos:
+                caminos[i] = [row * cols + col for row, col in trayectoria]
+                reservar(caminos[i])
+        nodos_total = 0
+        for i in invalidos:
+            camino, nodos = camino_con_reservas(i, ocupadas, arcos, aparcado, ultima, T)
+            nodos_total += nodos
+            if camino is None or len(camino) - 1 > T:
+                return None, nodos_total
+            if len(camino) - 1 < T and tipo_celda[camino[-1]] != BLANCA:
+                return None, nodos_total
+            caminos[i] = camino
+            reservar(camino)
+
+        plan = []
+        for i in range(len(self.plan)):
+            trayectoria = [posicion_celda[celda] for celda in caminos[i]]
+            trayectoria += [trayectoria[-1]] * (T + 1 - len(trayectoria))
+            plan.append(trayectoria)
+        return plan, nodos_total
+
+#######################################################################
+# Ejecución desde la línea de órdenes
+#######################################################################
+
+def main():
+    args_cli = parser.parse_args()
+    try:
+        comprobar_opciones(args_cli)
+    except ValueError as e:
+        parser.error(str(e))
+    if args_cli.metricas or args_cli.progreso:
+        activar_metricas(args_cli.progreso)
+
+    inicio = time.perf_counter()
+    datos = leer_mapa(args_cli.map_path)
+    preparar(datos, args_cli.num_heuristica, args_cli)
+    registrar_fase("lectura", inicio, excluir=("compilacion", "distancias"))
+    inicio = time.perf_counter()
+    plan, makespan, h_inicial, nodos_expandidos, tiempo_total = ejecutar_busqueda()
+    registrar_fase("busqueda", inicio, excluir=("pdb",))
+
+    if plan is None:
+        estadisticas = dict(estadisticas_extra)
+        if tiempo_total is not None:
+            # Búsqueda incompleta (prioridades, anytime sin tiempo): el .stat
+            # dice hasta dónde ha llegado
+            estadisticas = resumen_estadisticas(tiempo_total, SIN_PLAN, h_inicial, nodos_expandidos)
+            escribir_estadisticas(estadisticas)
+        if args_cli.metricas:
+            escribir_metricas(estadisticas)
+        print("No se ha encontrado solución")
+        sys.exit(0)
+
+    inicio = time.perf_counter()
+    estadisticas = resumen_estadisticas(tiempo_total, makespan, h_inicial, nodos_expandidos)
+    escribir_solucion(plan)
+    escribir_estadisticas(estadisticas)
+    registrar_fase("escritura", inicio)
+    if args_cli.metricas:
+        escribir_metricas(estadisticas)
 
-with open(stat_file, 'w') as f_stat:
-    f_stat.write(f"Tiempo total: {float(tiempo_total)}s\n")
-    f_stat.write(f"Makespan: {makespan}\n")
-    f_stat.write(f"h inicial: {h_inicial}\n")
-    f_stat.write(f"Nodos expandidos: {nodos_expandidos}\n")
+    print("Solución y estadísticas generadas.")
 
-print("Solución y estadísticas generadas.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Servicio de planificación residente: un servidor HTTP en localhost que
+# mantiene los mapas leídos y los campos de distancias en memoria entre
+# peticiones, en lugar de pagar la lectura y precalcular_distancias en cada
+# ejecución de ASTARRodaje.py.
+#
+# Uso: python ASTARServicio.py [--host 127.0.0.1] [--puerto 8765]
+#          [--cache-memoria N] [--mapa mapa.csv ...]
+#
+# POST /planificar con un JSON
+#   {"mapa": "ruta/mapa.csv",
+#    "aviones": [[[fila, col], [fila, col]], ...],   (inicial, final)
+#    "heuristica": 2,                                 (opcional, por defecto 2)
+#    "opciones": {"motor": "cbs", ...}}               (opcional)
+# responde
+#   {"makespan": 8, "plan": ["(0,0) → (0,1) ...", ...], "estadisticas": {...}}
+# con las mismas líneas que escribe el .output ("plan": null si no hay
+# solución). Si no se dan "aviones" se usan los del propio mapa.
+#
+# GET /estado devuelve los mapas cargados y el tamaño de la caché.
+#
+# Las peticiones se atienden de una en una: el estado de la búsqueda vive en
+# variables del módulo ASTARRodaje (ver su sección API).
+
+import os
+import json
+import argparse
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import ASTARRodaje as rodaje
+
+# Mapas leídos, por ruta absoluta
+mapas_cargados = {}
+
+def cargar_mapa(ruta):
+    ruta = os.path.abspath(ruta)
+    if ruta not in mapas_cargados:
+        try:
+            mapas_cargados[ruta] = rodaje.leer_mapa(ruta)
+        except OSError:
+            raise ValueError(f"No se puede abrir el mapa: {ruta}")
+        except (ValueError, IndexError):
+            raise ValueError(f"Formato de mapa no válido: {ruta}")
+    return mapas_cargados[ruta]
+
+def es_posicion(valor):
+    # [fila, col] con dos enteros
+    return (isinstance(valor, list) and len(valor) == 2
+            and all(isinstance(x, int) and not isinstance(x, bool) for x in valor))
+
+def validar_peticion(peticion):
+    # Comprueba la forma de la petición antes de tocar el mapa o la búsqueda,
+    # para responder con un mensaje claro en lugar del error de Python
+    if not isinstance(peticion, dict):
+        raise ValueError("La petición debe ser un objeto JSON")
+    if "mapa" not in peticion:
+        raise ValueError("Falta el campo 'mapa'")
+    if not isinstance(peticion["mapa"], str):
+        raise ValueError("'mapa' debe ser la ruta de un fichero .csv")
+    if "aviones" in peticion:
+        aviones = peticion["aviones"]
+        if (not isinstance(aviones, list) or not aviones
+                or not all(isinstance(avion, list) and len(avion) == 2 and all(map(es_posicion, avion))
+                           for avion in aviones)):
+            raise ValueError("'aviones' debe ser una lista no vacía de pares [[fila, col], [fila, col]]")
+    heuristica = peticion.get("heuristica", 2)
+    if isinstance(heuristica, bool) or heuristica not in (1, 2, 3):
+        raise ValueError("'heuristica' debe ser 1, 2 o 3")
+    if heuristica == 3 and rodaje.np is None:
+        raise ValueError("La heurística 3 requiere numpy")
+    opciones = peticion.get("opciones", {})
+    if not isinstance(opciones, dict):
+        raise ValueError("'opciones' debe ser un objeto JSON")
+    conocidas = vars(rodaje.opciones_busqueda())
+    for clave in opciones:
+        if clave in ("map_path", "num_heuristica") or clave not in conocidas:
+            raise ValueError(f"Opción desconocida: {clave}")
+
+def planificar(peticion):
+    validar_peticion(peticion)
+    datos = cargar_mapa(peticion["mapa"])
+    if "aviones" in peticion:
+        iniciales = [tuple(inicial) for inicial, _ in peticion["aviones"]]
+        finales = [tuple(final) for _, final in peticion["aviones"]]
+        rows, cols = len(datos.mapa), len(datos.mapa[0])
+        for row, col in iniciales + finales:
+            if not (0 <= row < rows and 0 <= col < cols) or not rodaje.es_transitable(datos.mapa[row][col]):
+                raise ValueError(f"Posición no transitable: ({row},{col})")
+        datos = datos.con_aviones(iniciales, finales)
+    else:
+        datos = datos.con_aviones(datos.iniciales, datos.finales)
+
+    plan, estadisticas = rodaje.resolver(datos, peticion.get("heuristica", 2), **peticion.get("opciones", {}))
+    if plan is None:
+        return {"makespan": None, "plan": None, "estadisticas": estadisticas}
+    return {
+        "makespan": estadisticas["Makespan"],
+        "plan": rodaje.formatear_plan(plan),
+        "estadisticas": estadisticas,
+    }
+
+class ManejadorPlanificacion(BaseHTTPRequestHandler):
+    def responder(self, codigo, cuerpo):
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        if self.path != "/estado":
+            self.responder(404, {"error": "Ruta desconocida"})
+            return
+        self.responder(200, {
+            "mapas": sorted(mapas_cargados),
+            "campos en memoria": len(rodaje.cache_memoria),
+            "capacidad": rodaje.capacidad_cache_memoria,
+        })
+
+    def do_POST(self):
+        if self.path != "/planificar":
+            self.responder(404, {"error": "Ruta desconocida"})
+            return
+        try:
+            longitud = int(self.headers.get("Content-Length", 0))
+            peticion = json.loads(self.rfile.read(longitud))
+        except ValueError:
+            self.responder(400, {"error": "El cuerpo de la petición no es JSON válido"})
+            return
+        try:
+            respuesta = planificar(peticion)
+        except ValueError as e:
+            # Errores de la petición: validar_peticion, posiciones del mapa y
+            # opciones incompatibles (comprobar_opciones)
+            self.responder(400, {"error": str(e)})
+            return
+        self.responder(200, respuesta)
+
+    def log_message(self, formato, *argumentos):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python ASTARServicio.py [--host H] [--puerto P] [--cache-memoria N] [--mapa mapa.csv ...]"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    # Número máximo de campos de distancias (mapa, celda meta) en memoria
+    parser.add_argument("--cache-memoria", type=int, default=256)
+    # Mapas que se cargan al arrancar (el resto se cargan en la primera petición)
+    parser.add_argument("--mapa", action="append", default=[])
+    args = parser.parse_args()
+
+    rodaje.activar_cache_memoria(args.cache_memoria)
+    for ruta in args.mapa:
+        cargar_mapa(ruta)
+
+    servidor = HTTPServer((args.host, args.puerto), ManejadorPlanificacion)
+    print(f"Servicio de planificación en http://{args.host}:{args.puerto}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    servidor.server_close()
+
+if __name__ == "__main__":
+    main()